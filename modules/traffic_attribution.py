@@ -9,15 +9,20 @@ Integrated with existing QuickBooks and Freshdesk data.
 
 import os
 import re
+import sys
+import time
+import hashlib
 import logging
 import datetime
 import warnings
-from collections import defaultdict
+import functools
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from dateutil import parser
 from datetime import timedelta
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, List, Dict, Optional, Tuple
 
 # Import our data loader
 from .traffic_data_loader import TrafficDataLoader
@@ -30,13 +35,29 @@ logging.basicConfig(
 )
 logger = logging.getLogger('traffic_attribution')
 
-# Import fuzzy matching if available
+# Import fuzzy matching if available - RapidFuzz (C++ Levenshtein) first, fuzzywuzzy as fallback
+try:
+    from rapidfuzz import fuzz as rapid_fuzz, process as rapid_process
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
+
 try:
     from fuzzywuzzy import fuzz, process
-    FUZZY_AVAILABLE = True
+    FUZZYWUZZY_AVAILABLE = True
+except ImportError:
+    FUZZYWUZZY_AVAILABLE = False
+
+FUZZY_AVAILABLE = RAPIDFUZZ_AVAILABLE or FUZZYWUZZY_AVAILABLE
+if not FUZZY_AVAILABLE:
+    logger.warning("rapidfuzz/fuzzywuzzy not available - using basic string matching")
+
+# pyarrow backs the parquet API cache and Arrow string keys (optional)
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
 except ImportError:
-    logger.warning("fuzzywuzzy not available - using basic string matching")
-    FUZZY_AVAILABLE = False
+    PYARROW_AVAILABLE = False
 
 # Color codes for better terminal output
 class Colors:
@@ -49,7 +70,429 @@ class Colors:
 
 def print_colored(text: str, color: str):
     """Print text with color for better readability"""
-    print(f"{color}{text}{Colors.ENDC}")
+    # One formatted write per line (print would issue separate writes for the text and newline)
+    sys.stdout.write(f"{color}{text}{Colors.ENDC}\n")
+
+# Normalization used by fuzzywuzzy's token_sort_ratio (force_ascii drops chr 128-255)
+_NON_WORD_RE = re.compile(r'(?ui)\W')
+_FORCE_ASCII_TABLE = {i: None for i in range(128, 256)}
+
+# Word tokens for keyword extraction
+_WORD_RE = re.compile(r'\b\w+\b')
+
+# Customer email addresses considered valid
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+def token_sort_key(text: str) -> str:
+    """Normalize text like fuzzywuzzy's token_sort_ratio: ascii-only, lowercase, sorted tokens"""
+    processed = _NON_WORD_RE.sub(' ', str(text).translate(_FORCE_ASCII_TABLE)).lower().strip()
+    return ' '.join(sorted(processed.split()))
+
+@functools.lru_cache(maxsize=200000)
+def cached_token_sort_ratio(a: str, b: str, score_cutoff: int = 60) -> int:
+    """
+    token_sort_ratio memoized on the string pair - the same keywords recur across leads.
+
+    RapidFuzz stops early once a pair cannot score above score_cutoff and reports 0 for it;
+    scores above the cutoff match fuzzywuzzy's.
+    """
+    if RAPIDFUZZ_AVAILABLE:
+        key_a, key_b = token_sort_key(a), token_sort_key(b)
+        # fuzzywuzzy scores 0 when exactly one side normalizes to nothing (100 when both do);
+        # RapidFuzz would give 100
+        if bool(key_a) != bool(key_b):
+            return 0
+        return round(rapid_fuzz.ratio(key_a, key_b, score_cutoff=score_cutoff + 0.5))
+    return fuzz.token_sort_ratio(a, b)
+
+def lowercase_strings(values: pd.Series) -> List[str]:
+    """
+    Lowercased str() of each value, computed once per distinct value.
+
+    Query columns repeat the same strings across rows, so the column is dictionary
+    encoded as a Categorical (if it isn't already) and only its categories are lowered.
+    """
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype('category')
+    # Missing values have code -1, which picks the trailing 'nan' like str(nan) would
+    lowered = np.append(values.cat.categories.astype(str).str.lower().to_numpy(dtype=object), 'nan')
+    return lowered[values.cat.codes.to_numpy()].tolist()
+
+@functools.lru_cache(maxsize=100000)
+def text_keywords(text: str) -> Tuple[str, ...]:
+    """
+    Lowercased words of text plus its 2-3 word phrases, memoized on the text.
+
+    PPC and SEO keywords repeat across rows and runs, so each distinct string is
+    tokenized once. Returns a tuple so cached results can't be mutated by callers.
+    """
+    # Extract words from the lowercased text
+    words = _WORD_RE.findall(text.lower())
+
+    # Individual words, then the 2-3 word phrases: each 2-word phrase is followed by
+    # the 3-word phrase starting at the same word
+    bigrams = [f"{a} {b}" for a, b in zip(words, words[1:])]
+    trigrams = [f"{a} {b} {c}" for a, b, c in zip(words, words[1:], words[2:])]
+    phrases = [None] * (len(bigrams) + len(trigrams))
+    phrases[::2] = bigrams
+    phrases[1::2] = trigrams
+
+    return tuple(words + phrases)
+
+def keyword_scorer(fallback: str = 'substring', score_cutoff: int = 60) -> Callable[[str, str], int]:
+    """
+    Pick the pairwise keyword scorer once, outside the matching loops.
+
+    token_sort_ratio when a fuzzy library is installed, short-circuiting pairs that
+    cannot score above score_cutoff; otherwise 'substring' (100 when the keyword
+    appears in the choice) or 'exact' (100 on equality).
+    """
+    if FUZZY_AVAILABLE:
+        if score_cutoff == 60:
+            return cached_token_sort_ratio
+        return functools.partial(cached_token_sort_ratio, score_cutoff=score_cutoff)
+    if fallback == 'substring':
+        return lambda a, b: 100 if a in b else 0
+    return lambda a, b: 100 if a == b else 0
+
+def keyword_similarity_matrix(keywords: List[str], choices: List[str], fallback: str = 'substring',
+                              score_cutoff: int = 60, keyword_keys: Optional[List[str]] = None) -> np.ndarray:
+    """
+    Score every (keyword, choice) pair with token_sort_ratio in one batch.
+
+    With RapidFuzz this is a single cdist call over pre-normalized strings, giving the
+    same integer scores as fuzzywuzzy.fuzz.token_sort_ratio. Otherwise pairs are scored
+    one at a time with fuzzywuzzy, or with 'substring'/'exact' matching when no fuzzy
+    library is installed.
+
+    Callers only act on scores above score_cutoff, so pairs that cannot get there are
+    skipped (or cut off early by RapidFuzz) and left at 0. keyword_keys can carry the
+    token_sort_key of each keyword when the caller already has them.
+    """
+    scores = np.zeros((len(keywords), len(choices)), dtype=np.int16)
+    if len(keywords) == 0 or len(choices) == 0:
+        return scores
+
+    if RAPIDFUZZ_AVAILABLE:
+        if keyword_keys is None:
+            keyword_keys = [token_sort_key(kw) for kw in keywords]
+        choice_keys = [token_sort_key(choice) for choice in choices]
+        matrix = rapid_process.cdist(
+            keyword_keys,
+            choice_keys,
+            scorer=rapid_fuzz.ratio,
+            processor=None,
+            score_cutoff=score_cutoff + 0.5,
+            workers=-1
+        )
+        scores = np.rint(matrix).astype(np.int16)
+        # fuzzywuzzy scores 0 when exactly one side normalizes to nothing (100 when both do);
+        # RapidFuzz would give 100
+        empty_keywords = np.array([not key for key in keyword_keys], dtype=bool)
+        empty_choices = np.array([not key for key in choice_keys], dtype=bool)
+        scores[empty_keywords[:, None] != empty_choices[None, :]] = 0
+        return scores
+
+    if FUZZYWUZZY_AVAILABLE:
+        # ratio is at most 200 * min(len) / (len_a + len_b), so only pairs with
+        # close enough normalized lengths can clear the cutoff
+        choice_lengths = np.array([len(token_sort_key(choice)) for choice in choices])
+        for i, kw in enumerate(keywords):
+            kw_length = len(token_sort_key(kw))
+            reachable = (200 * np.minimum(kw_length, choice_lengths) > score_cutoff * (kw_length + choice_lengths)) | \
+                        (kw_length + choice_lengths == 0)
+            for j in np.nonzero(reachable)[0]:
+                scores[i, j] = cached_token_sort_ratio(kw, choices[j])
+    elif fallback == 'substring':
+        scorer = keyword_scorer('substring')
+        for i, kw in enumerate(keywords):
+            for j, choice in enumerate(choices):
+                scores[i, j] = scorer(kw, choice)
+    else:
+        # Exact matching only needs a lookup from each choice to its columns
+        choice_columns = defaultdict(list)
+        for j, choice in enumerate(choices):
+            choice_columns[choice].append(j)
+        for i, kw in enumerate(keywords):
+            scores[i, choice_columns.get(kw, [])] = 100
+    return scores
+
+def window_keyword_hits(lead_scores: np.ndarray, window_rows: np.ndarray, term_offsets: np.ndarray,
+                        flat_term_ids: np.ndarray, threshold: int = 60) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Lead keyword x keyword term pairs scoring above threshold, for the given PPC/SEO keyword rows.
+
+    lead_scores holds the lead's keyword rows of the similarity matrix; row r's term ids are
+    flat_term_ids[term_offsets[r]:term_offsets[r + 1]]. The rows' term columns are gathered
+    into one block and compared at once. Returns the keyword positions, term ids and scores
+    of the hits, and the position in window_rows each came from, ordered by row, then lead
+    keyword, then term within the row.
+    """
+    starts = term_offsets[window_rows]
+    lengths = term_offsets[window_rows + 1] - starts
+    block_starts = np.cumsum(lengths) - lengths
+    columns = np.repeat(starts - block_starts, lengths) + np.arange(lengths.sum())
+    term_ids = flat_term_ids[columns]
+    column_rows = np.repeat(np.arange(len(window_rows)), lengths)
+
+    scores = lead_scores[:, term_ids]
+    kw_pos, col_pos = np.nonzero(scores > threshold)
+    order = np.lexsort((col_pos, kw_pos, column_rows[col_pos]))
+    kw_pos, col_pos = kw_pos[order], col_pos[order]
+    return kw_pos, term_ids[col_pos], scores[kw_pos, col_pos], column_rows[col_pos]
+
+# PPC time proximity scores: a gap of at most PPC_TIME_GAP_BINS[i] hours scores PPC_TIME_GAP_SCORES[i]
+PPC_TIME_GAP_BINS = np.array([1, 6, 12, 24, 48])
+PPC_TIME_GAP_SCORES = np.array([100, 95, 85, 75, 60])
+
+# Every value attributed_source can take; the column is stored as a Categorical over these
+ATTRIBUTION_SOURCES = ['Unknown', 'Direct', 'SEO', 'PPC', 'Referral']
+
+# Likewise for data_source (which method made the attribution) and confidence_level
+DATA_SOURCES = ['unknown', 'quickbooks_cached', 'customer_db_fallback', 'customer_db_emergency',
+                'gsc_enhanced', 'gsc_api', 'seo_csv', 'ppc_csv', 'pattern', 'ga4_ppc']
+CONFIDENCE_LEVELS = ['Unknown', 'Low', 'Medium', 'High']
+PPC_CAMPAIGN_TYPES = ['Standard', 'Dynamic']
+
+def observed_value_counts(values: pd.Series) -> pd.Series:
+    """
+    value_counts() that behaves the same for object and Categorical columns.
+
+    Unused categories are dropped and ties keep the order values first appear in,
+    matching what value_counts() gives for the equivalent object column.
+    """
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        return values.value_counts()
+    
+    codes = values.cat.codes.to_numpy()
+    observed, first_seen, counts = np.unique(codes[codes >= 0], return_index=True, return_counts=True)
+    order = np.lexsort((first_seen, -counts))
+    index = pd.Index(values.cat.categories[observed[order]], dtype=object, name=values.name)
+    return pd.Series(counts[order], index=index, name='count')
+
+def contains_text(values: pd.Series, text: str) -> pd.Series:
+    """
+    Mask of values containing text as a plain substring (no regex); missing values are False.
+
+    Categorical columns are checked once per category rather than once per row.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        categories = values.cat.categories
+        return values.isin(categories[categories.astype(str).str.contains(text, regex=False)])
+    return values.str.contains(text, regex=False, na=False)
+
+def wall_clock_fields(timestamps: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Hour of day and day of week (Monday=0) of each timestamp, straight from int64 nanoseconds.
+
+    Timezone-aware timestamps use their local wall-clock time, as .dt.hour/.dt.dayofweek would.
+    """
+    if timestamps.dt.tz is not None:
+        timestamps = timestamps.dt.tz_localize(None)
+    ns = timestamps.to_numpy(dtype='datetime64[ns]').astype('int64')
+    hours = (ns // 3_600_000_000_000) % 24
+    # 1970-01-01 was a Thursday
+    days_of_week = (ns // 86_400_000_000_000 + 3) % 7
+    return hours, days_of_week
+
+def product_mentions(products: pd.Series) -> pd.Series:
+    """Each ';'-separated product mention as its own row, labelled with its lead's index."""
+    mentions = products.fillna('').astype(str).str.split(';').explode().str.strip()
+    return mentions[mentions != '']
+
+def product_mention_counts(products: pd.Series) -> pd.Series:
+    """Count the ';'-separated product mentions across leads, most mentioned first."""
+    return product_mentions(products).value_counts()
+
+def count_breakdown_lines(counts: pd.Series, total: int, label_width: int) -> List[str]:
+    """Report lines of the form 'label: count leads (pct%)', one per entry of a counts Series."""
+    percentages = counts.to_numpy() / total * 100
+    return [f"{label:{label_width}}: {count:4d} leads ({percentage:5.1f}%)\n"
+            for label, count, percentage in zip(counts.index, counts.tolist(), percentages.tolist())]
+
+def aggregate_keyword_matches(lead_keyword_rows: List[np.ndarray], similarity_matrix: np.ndarray,
+                              similarity_weights, query_terms: List[np.ndarray],
+                              totals: Tuple[np.ndarray, ...] = (), lowest: Optional[np.ndarray] = None,
+                              highest: Optional[np.ndarray] = None, threshold: int = 60,
+                              chunk_size: int = 256) -> Tuple[np.ndarray, np.ndarray, List[np.ndarray], np.ndarray, np.ndarray]:
+    """
+    Per-lead aggregates over the (lead keyword, query) pairs scoring above threshold.
+
+    For each lead, in order: whether any pair matched, the best match score
+    (similarity * similarity_weights + each of query_terms), the sum of each totals
+    array over the matched pairs, and the fmin/fmax of lowest/highest over them.
+
+    Leads are split into chunks scored on a thread pool. Each chunk only materializes
+    the int16 score rows of its leads' keywords and reduces over the pairs that clear
+    threshold, so no dense float (keyword row x query) arrays are built per worker.
+    """
+    n_queries = similarity_matrix.shape[1]
+    lowest = np.full(n_queries, np.nan) if lowest is None else lowest
+    highest = np.full(n_queries, np.nan) if highest is None else highest
+    similarity_weights = np.broadcast_to(similarity_weights, (n_queries,))
+
+    def score_chunk(start: int):
+        chunk_rows = lead_keyword_rows[start:start + chunk_size]
+        has_rows = np.array([len(rows) > 0 for rows in chunk_rows], dtype=bool)
+        matched = np.zeros(len(chunk_rows), dtype=bool)
+        match_scores = np.full(len(chunk_rows), -np.inf)
+        chunk_totals = [np.zeros(len(chunk_rows), dtype=np.result_type(values.dtype, np.int_)) for values in totals]
+        chunk_lowest = np.full(len(chunk_rows), np.inf)
+        chunk_highest = np.full(len(chunk_rows), -np.inf)
+        if not has_rows.any() or n_queries == 0:
+            return matched, match_scores, chunk_totals, chunk_lowest, chunk_highest
+
+        # One row per lead keyword; find the matching pairs, then reduce them per lead.
+        # nonzero() walks rows in order, so each lead's pairs are contiguous
+        lengths = np.array([len(rows) for rows in chunk_rows if len(rows) > 0])
+        row_leads = np.repeat(np.flatnonzero(has_rows), lengths)
+        scores = similarity_matrix[np.concatenate(chunk_rows)]
+        rows, queries = np.nonzero(scores > threshold)
+        if len(rows) == 0:
+            return matched, match_scores, chunk_totals, chunk_lowest, chunk_highest
+
+        pair_leads = row_leads[rows]
+        leads, offsets = np.unique(pair_leads, return_index=True)
+        weighted = scores[rows, queries] * similarity_weights[queries]
+        for terms in query_terms:
+            weighted = weighted + terms[queries]
+        matched[leads] = True
+        match_scores[leads] = np.maximum.reduceat(weighted, offsets)
+        for chunk_total, values in zip(chunk_totals, totals):
+            chunk_total[leads] = np.add.reduceat(values[queries].astype(chunk_total.dtype), offsets)
+        chunk_lowest[leads] = np.fmin.reduceat(np.fmin(lowest[queries], np.inf), offsets)
+        chunk_highest[leads] = np.fmax.reduceat(np.fmax(highest[queries], -np.inf), offsets)
+        return matched, match_scores, chunk_totals, chunk_lowest, chunk_highest
+
+    starts = range(0, len(lead_keyword_rows), chunk_size)
+    if len(starts) > 1:
+        with ThreadPoolExecutor(max_workers=min(len(starts), os.cpu_count() or 1)) as executor:
+            chunks = list(executor.map(score_chunk, starts))
+    else:
+        chunks = [score_chunk(start) for start in starts]
+
+    if not chunks:
+        return (np.zeros(0, dtype=bool), np.zeros(0), [np.zeros(0, dtype=np.result_type(values.dtype, np.int_)) for values in totals],
+                np.zeros(0), np.zeros(0))
+    return (
+        np.concatenate([chunk[0] for chunk in chunks]),
+        np.concatenate([chunk[1] for chunk in chunks]),
+        [np.concatenate([chunk[2][i] for chunk in chunks]) for i in range(len(totals))],
+        np.concatenate([chunk[3] for chunk in chunks]),
+        np.concatenate([chunk[4] for chunk in chunks]),
+    )
+
+def downcast_counts(df: pd.DataFrame, columns: Tuple[str, ...] = ('clicks', 'impressions')) -> pd.DataFrame:
+    """
+    Store integer count columns as int32 so the numpy scoring paths move half the bytes.
+
+    Only int64-style columns whose values fit are narrowed, so nothing is rounded and
+    printed counts don't change; float columns (e.g. with coerced NaNs) are left alone.
+    """
+    int32_max = np.iinfo(np.int32).max
+    for column in columns:
+        if column not in df.columns or not pd.api.types.is_integer_dtype(df[column]) or df[column].empty:
+            continue
+        values = df[column]
+        if values.min() >= -int32_max and values.max() <= int32_max:
+            df[column] = values.astype(np.int32)
+    return df
+
+def position_bonus_ladder(best_positions: np.ndarray, bonuses: Tuple[int, int, int]) -> np.ndarray:
+    """Position quality bonus per lead: bonuses for top 3 / top 10 / top 20 positions, 0 beyond"""
+    return np.select([best_positions <= 3, best_positions <= 10, best_positions <= 20], list(bonuses), 0)
+
+# On-disk cache for GSC/GA4 API pulls
+API_CACHE_DIR = './cache'
+API_CACHE_TTL_HOURS = 6
+
+# Progress bar: fixed width, sliced from prebuilt strings; redraws that wouldn't move the
+# bar are skipped if they come less than PROGRESS_BAR_MIN_INTERVAL seconds apart
+PROGRESS_BAR_LENGTH = 40
+PROGRESS_BAR_FILLED = '█' * PROGRESS_BAR_LENGTH
+PROGRESS_BAR_EMPTY = '-' * PROGRESS_BAR_LENGTH
+PROGRESS_BAR_MIN_INTERVAL = 0.1
+
+def ensure_output_dir(output_path: str):
+    """Create the directory output_path will be written to, if it has one"""
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+def _api_cache_path(prefix: str, key_parts: tuple) -> str:
+    """Build the cache file path for a (property, start, end, ...) key"""
+    key = hashlib.sha1('|'.join(str(part) for part in key_parts).encode()).hexdigest()
+    extension = 'parquet' if PYARROW_AVAILABLE else 'pkl'
+    return os.path.join(API_CACHE_DIR, f"{prefix}_{key}.{extension}")
+
+def cached_api_frame(prefix: str, result_attr: str, key_func):
+    """
+    Cache a loader's DataFrame result on disk, keyed by the parts returned from key_func.
+
+    A fresh cache hit (younger than API_CACHE_TTL_HOURS) is stored on result_attr
+    and returned without calling the API. Empty/None results are never cached.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            try:
+                key_parts = key_func(self, *args, **kwargs)
+            except Exception as e:
+                print_colored(f"Warning: Could not build {prefix.upper()} cache key ({e}), loading without cache", Colors.YELLOW)
+                key_parts = None
+            if not key_parts:
+                return method(self, *args, **kwargs)
+
+            cache_path = _api_cache_path(prefix, key_parts)
+            if os.path.exists(cache_path) and time.time() - os.path.getmtime(cache_path) < API_CACHE_TTL_HOURS * 3600:
+                try:
+                    if PYARROW_AVAILABLE:
+                        cached_df = pd.read_parquet(cache_path)
+                    else:
+                        cached_df = pd.read_pickle(cache_path)
+                    setattr(self, result_attr, cached_df)
+                    print_colored(f"✓ Loaded {len(cached_df)} cached {prefix.upper()} records from {cache_path}", Colors.GREEN)
+                    return cached_df
+                except Exception as e:
+                    print_colored(f"Warning: Could not read {prefix.upper()} cache ({e}), refetching", Colors.YELLOW)
+
+            result = method(self, *args, **kwargs)
+
+            if isinstance(result, pd.DataFrame) and not result.empty:
+                try:
+                    os.makedirs(API_CACHE_DIR, exist_ok=True)
+                    if PYARROW_AVAILABLE:
+                        result.to_parquet(cache_path, compression='zstd', index=False)
+                    else:
+                        result.to_pickle(cache_path)
+                except Exception as e:
+                    print_colored(f"Warning: Could not write {prefix.upper()} cache: {e}", Colors.YELLOW)
+
+            return result
+        return wrapper
+    return decorator
+
+def _gsc_cache_key(self, property_url: str, start_date: datetime.datetime, end_date: datetime.datetime):
+    """Cache key for _load_gsc_window: property and the day-granular date window"""
+    if not self.gsc_client:
+        return None
+    property_url = property_url or getattr(self.gsc_client, 'property_url', None) or self.gsc_property_url
+    return (property_url, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+
+def _ga4_cache_key(self, lead_dates: pd.Series = None):
+    """Cache key for load_ga4_traffic_patterns: property and the lead-derived date window"""
+    if lead_dates is None:
+        if self.leads_df is None:
+            return None
+        lead_dates = self.leads_df['first_ticket_date']
+    if not self.ga4_client:
+        return None
+    valid_timestamps = lead_dates.dropna()
+    if len(valid_timestamps) == 0:
+        return None
+    start_date = valid_timestamps.min() - pd.Timedelta(days=7)
+    end_date = valid_timestamps.max() + pd.Timedelta(days=1)
+    return (getattr(self.ga4_client, 'property_id', None), start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
 
 class LeadAttributionAnalyzer:
     def __init__(self, use_gsc=False, gsc_credentials_path=None, gsc_property_url=None, gsc_client=None, use_ga4=False, ga4_property_id=None, compare_methods=False):
@@ -59,7 +502,22 @@ class LeadAttributionAnalyzer:
         self.ppc_standard_df = None
         self.ppc_dynamic_df = None
         self.combined_ppc_df = None
+        self._ppc_by_keyword = None
+        self._ppc_by_keyword_source = None
+        self._ppc_keyword_terms = None
+        self._ppc_keyword_terms_source = None
+        self._ppc_active_rows = None
+        self._ppc_active_rows_source = None
+        self._seo_keyword_terms = None
+        self._seo_keyword_terms_source = None
+        self._keyword_vocab = None
+        self._keyword_vocab_keys = None
+        self._lead_keyword_ids = None
+        self._stats_cache = None
+        self._stats_cache_index = None
+        self._progress_bar_state = None
         self.product_keyword_map = None
+        self._product_category_patterns = []
         self.attribution_window_hours = 48
         self.confidence_thresholds = {
             'high': 80,
@@ -71,6 +529,7 @@ class LeadAttributionAnalyzer:
         self.use_gsc = use_gsc
         self.gsc_client = gsc_client
         self.gsc_data = None
+        self._gsc_loaded = False
         self.gsc_property_url = gsc_property_url
         self.gsc_keywords_df = None
         
@@ -390,7 +849,7 @@ class LeadAttributionAnalyzer:
                 seo_df['current_position'] = 100
             
             # Add product category based on keyphrase
-            seo_df['product_category'] = seo_df['keyphrase'].apply(self.extract_product_category_from_keyword)
+            seo_df['product_category'] = self.categorize_keywords(seo_df['keyphrase'])
             
             print_colored(f"   ✓ Loaded {len(seo_df)} SEO keywords with positions", Colors.GREEN)
             
@@ -423,7 +882,7 @@ class LeadAttributionAnalyzer:
         ]
         
         seo_df = pd.DataFrame(mock_keywords, columns=['keyphrase', 'current_position'])
-        seo_df['product_category'] = seo_df['keyphrase'].apply(self.extract_product_category_from_keyword)
+        seo_df['product_category'] = self.categorize_keywords(seo_df['keyphrase'])
         
         print_colored(f"   ✓ Created mock SEO data with columns: {list(seo_df.columns)}", Colors.BLUE)
         
@@ -504,10 +963,11 @@ class LeadAttributionAnalyzer:
             # Use analysis_period as fallback for missing timestamps
             if 'analysis_period' in self.leads_df.columns:
                 fallback_mask = self.leads_df['first_ticket_date'].isna()
-                fallback_dates = self.leads_df.loc[fallback_mask, 'analysis_period'].apply(
-                    self.parse_analysis_period_to_date
-                )
-                self.leads_df.loc[fallback_mask, 'first_ticket_date'] = pd.to_datetime(fallback_dates, errors='coerce')
+                # Same rule as parse_analysis_period_to_date, for the whole column at once:
+                # the end month of "March 2025 - May 2025", or now when that can't be parsed
+                end_parts = self.leads_df.loc[fallback_mask, 'analysis_period'].astype(str).str.split(' - ').str[1].str.strip()
+                fallback_dates = pd.to_datetime(end_parts, format='%B %Y', errors='coerce').fillna(pd.Timestamp.now())
+                self.leads_df.loc[fallback_mask, 'first_ticket_date'] = fallback_dates
                 self.leads_df.loc[fallback_mask, 'first_inquiry_timestamp'] = self.leads_df.loc[fallback_mask, 'first_ticket_date']
 
         # Extract keywords from products_mentioned and ticket_subjects
@@ -516,10 +976,10 @@ class LeadAttributionAnalyzer:
         )
 
         # Initialize attribution columns
-        self.leads_df['attributed_source'] = 'Unknown'
+        self.leads_df['attributed_source'] = pd.Categorical(['Unknown'] * len(self.leads_df), categories=ATTRIBUTION_SOURCES)
         self.leads_df['attribution_confidence'] = 0
         self.leads_df['attribution_detail'] = ''
-        self.leads_df['data_source'] = 'unknown'
+        self.leads_df['data_source'] = pd.Categorical(['unknown'] * len(self.leads_df), categories=DATA_SOURCES)
         
         # Initialize comparison columns if in comparison mode
         if self.compare_methods:
@@ -680,23 +1140,28 @@ class LeadAttributionAnalyzer:
         
         print_colored("Enhancing SEO data with real GSC click information...", Colors.BLUE)
         
+        # Group on Arrow-backed strings when available (faster hashing than object dtype).
+        # Queries stay sorted: later stable sorts on clicks break ties in this order, and
+        # the match details keep only the top few queries
+        gsc_data = self.gsc_data
+        if PYARROW_AVAILABLE and gsc_data['query'].dtype == object:
+            gsc_data = gsc_data.astype({'query': 'string[pyarrow]'})
+        
         # Add click data to SEO keywords
-        click_summary = self.gsc_data.groupby('query').agg({
+        click_summary = gsc_data.groupby('query', observed=True).agg({
             'clicks': 'sum',
             'impressions': 'sum',
             'position': 'mean'
         }).reset_index()
         
         # Create enhanced keyword list with actual performance
-        self.gsc_keywords_df = click_summary.copy()
+        self.gsc_keywords_df = downcast_counts(click_summary.copy())
         self.gsc_keywords_df['has_clicks'] = self.gsc_keywords_df['clicks'] > 0
         self.gsc_keywords_df['keyphrase'] = self.gsc_keywords_df['query']  # For compatibility
         self.gsc_keywords_df['current_position'] = self.gsc_keywords_df['position']
         
         # Add product category mapping
-        self.gsc_keywords_df['product_category'] = self.gsc_keywords_df['query'].apply(
-            self.extract_product_category_from_keyword
-        )
+        self.gsc_keywords_df['product_category'] = self.categorize_keywords(self.gsc_keywords_df['query'])
         
         print_colored(f"✓ Enhanced with {len(self.gsc_keywords_df)} keywords from GSC", Colors.GREEN)
         print_colored(f"  - {self.gsc_keywords_df['has_clicks'].sum()} keywords have actual clicks", Colors.GREEN)
@@ -709,14 +1174,16 @@ class LeadAttributionAnalyzer:
         if not self.gsc_client:
             print_colored("No GSC client available for data loading", Colors.YELLOW)
             return None
-            
+
+        # Get data for attribution window - fixed once so the cache key and the pull agree
+        end_date = datetime.datetime.now()
+        start_date = end_date - timedelta(days=days_back)
+        return self._load_gsc_window(property_url, start_date, end_date)
+
+    @cached_api_frame('gsc', 'gsc_data', _gsc_cache_key)
+    def _load_gsc_window(self, property_url: str, start_date: datetime.datetime, end_date: datetime.datetime) -> pd.DataFrame:
+        """Pull GSC search queries for start_date..end_date (cached on disk per property and window)"""
         try:
-            from datetime import datetime, timedelta
-            
-            # Get data for attribution window
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days_back)
-            
             print_colored(f"Loading GSC data from {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}", Colors.BLUE)
             
             # Fetch search queries with clicks
@@ -726,6 +1193,12 @@ class LeadAttributionAnalyzer:
                 total_clicks = self.gsc_data['clicks'].sum()
                 print_colored(f"✓ Loaded {len(self.gsc_data)} search queries from GSC with {total_clicks} total clicks", Colors.GREEN)
                 
+                self.gsc_data = downcast_counts(self.gsc_data)
+                
+                # Queries repeat across dates/pages: keep them dictionary encoded so string
+                # work (lowering, grouping) happens once per distinct query
+                self.gsc_data['query'] = self.gsc_data['query'].astype('category')
+                
                 # Add some processing for better attribution
                 self.gsc_data['query_lower'] = self.gsc_data['query'].str.lower()
                 self.gsc_data['query_words'] = self.gsc_data['query_lower'].apply(
@@ -749,22 +1222,38 @@ class LeadAttributionAnalyzer:
         if self.gsc_data is not None:
             return self.gsc_data
         
-        # Try to load data if client is available
-        if self.gsc_client:
-            return self.load_gsc_data()
+        # Try to load data if client is available (only once per analyzer -
+        # a failed or empty pull is not retried on every call)
+        if self.gsc_client and not self._gsc_loaded:
+            self._gsc_loaded = True
+            gsc_data = self.load_gsc_data()
+            if gsc_data is not None:
+                return gsc_data
         
-        print_colored("GSC client not available - returning empty DataFrame", Colors.YELLOW)
+        if self._gsc_loaded:
+            print_colored("No GSC data available - returning empty DataFrame", Colors.YELLOW)
+        else:
+            print_colored("GSC client not available - returning empty DataFrame", Colors.YELLOW)
         return pd.DataFrame(columns=['date', 'query', 'clicks', 'impressions', 'position', 'page'])
 
-    def load_ga4_traffic_patterns(self):
-        """Load traffic patterns from GA4 for validation"""
+    @cached_api_frame('ga4', 'ga4_traffic_data', _ga4_cache_key)
+    def load_ga4_traffic_patterns(self, lead_dates: pd.Series = None):
+        """
+        Load traffic patterns from GA4 for validation
+        
+        Args:
+            lead_dates: Optional snapshot of first_ticket_date (used when loading
+                        in the background while leads_df is being updated)
+        """
         if not self.ga4_client:
             print_colored("GA4 client not available for pattern loading", Colors.YELLOW)
             return None
             
         try:
             # Get date range based on leads
-            valid_timestamps = self.leads_df['first_ticket_date'].dropna()
+            if lead_dates is None:
+                lead_dates = self.leads_df['first_ticket_date']
+            valid_timestamps = lead_dates.dropna()
             if len(valid_timestamps) == 0:
                 print_colored("No valid lead timestamps for GA4 date range", Colors.YELLOW)
                 return None
@@ -786,14 +1275,18 @@ class LeadAttributionAnalyzer:
             if self.ga4_traffic_data is not None and not self.ga4_traffic_data.empty:
                 print_colored(f"✓ Loaded {len(self.ga4_traffic_data)} GA4 traffic records", Colors.GREEN)
                 
+                # Small fixed vocabulary - categorical lets groupby/isin work on integer codes
+                self.ga4_traffic_data['medium'] = self.ga4_traffic_data['medium'].astype('category')
+                
                 # Show traffic summary
-                traffic_summary = self.ga4_traffic_data.groupby('medium')['sessions'].sum().sort_values(ascending=False)
+                traffic_summary = self.ga4_traffic_data.groupby('medium', observed=True)['sessions'].sum().sort_values(ascending=False)
                 print_colored("\nGA4 Traffic Summary:", Colors.BLUE)
                 for medium, sessions in traffic_summary.head().items():
                     print_colored(f"  - {medium}: {sessions} sessions", Colors.BLUE)
                 
                 # Specifically highlight PPC traffic
-                ppc_sessions = traffic_summary[traffic_summary.index.isin(['cpc', 'ppc', 'paid'])].sum()
+                ppc_medium_mask = self.ga4_traffic_data['medium'].isin(['cpc', 'ppc', 'paid'])
+                ppc_sessions = self.ga4_traffic_data.loc[ppc_medium_mask, 'sessions'].sum()
                 if ppc_sessions > 0:
                     print_colored(f"\n✓ Found {ppc_sessions} PPC sessions in GA4 data - will use for attribution", Colors.GREEN)
             else:
@@ -834,48 +1327,88 @@ class LeadAttributionAnalyzer:
             for subject in subjects:
                 keywords.extend(self.extract_keywords_from_text(subject.strip()))
         
-        return list(set(keywords))  # Remove duplicates
+        return list(dict.fromkeys(keywords))  # Remove duplicates, keeping first-seen order
 
     def extract_keywords_from_text(self, text: str) -> List[str]:
         """Extract keywords from text string"""
         if not isinstance(text, str):
             return []
 
-        # Convert to lowercase
-        text = text.lower()
-
-        # Extract words and phrases
-        words = re.findall(r'\b\w+\b', text)
-
-        # Return individual words and 2-3 word phrases
-        result = words.copy()
-        for i in range(len(words)-1):
-            result.append(f"{words[i]} {words[i+1]}")
-            if i < len(words)-2:
-                result.append(f"{words[i]} {words[i+1]} {words[i+2]}")
-
-        return result
+        return list(text_keywords(text))
 
     def process_customer_data(self):
         """Process and clean customer data"""
         if self.customers_df.empty or 'email' not in self.customers_df.columns:
             print_colored("No customer data available - direct traffic attribution disabled", Colors.BLUE)
-            self.customer_emails = set()
+            self.customer_emails = pd.Index([], dtype=object)
             return
 
         # Clean email addresses
         self.customers_df['email'] = self.customers_df['email'].astype(str).str.lower().str.strip()
 
         # Filter out invalid emails
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        valid_mask = self.customers_df['email'].str.match(email_pattern)
+        valid_mask = self.customers_df['email'].str.match(_EMAIL_RE)
 
-        # Create set of customer emails for faster lookup
+        # Keep customer emails as a hashed Index so leads can be matched with one isin pass
         valid_emails = self.customers_df.loc[valid_mask, 'email'].dropna().unique()
-        self.customer_emails = set(valid_emails)
+        self.customer_emails = pd.Index(valid_emails)
 
         print_colored(f"✓ Customer data processed: {len(self.customer_emails)} unique emails", Colors.GREEN)
 
+    def _ppc_frame_has_date(self, raw_df: pd.DataFrame) -> bool:
+        """Whether a raw PPC export carries a Date/date column"""
+        return 'Date' in raw_df.columns or 'date' in raw_df.columns
+
+    def _normalize_ppc_frame(self, raw_df: pd.DataFrame, keyword_col: str, campaign_type: str) -> Optional[pd.DataFrame]:
+        """
+        Map a raw PPC export onto the keyword/clicks/impressions/campaign_type/date columns.
+        
+        The frame is built with a single DataFrame constructor rather than a copy of the
+        export plus column-by-column assignment. Returns None if the keyword column is missing.
+        """
+        print_colored(f"   Processing PPC {campaign_type} data - columns: {list(raw_df.columns)}", Colors.BLUE)
+        label = campaign_type.lower()
+        
+        # Map columns properly - use actual column names from the DataFrame
+        if keyword_col not in raw_df.columns:
+            print_colored(f"   Warning: '{keyword_col}' column not found in {label} PPC data", Colors.YELLOW)
+            return None
+        
+        if 'Clicks' in raw_df.columns:
+            clicks = pd.to_numeric(raw_df['Clicks'], errors='coerce').fillna(0)
+        else:
+            print_colored(f"   Warning: 'Clicks' column not found in {label} PPC data", Colors.YELLOW)
+            clicks = 0
+        
+        if 'Impr.' in raw_df.columns:
+            # Handle impressions with commas
+            impressions = pd.to_numeric(
+                raw_df['Impr.'].astype(str).str.replace(',', '', regex=False),
+                errors='coerce'
+            ).fillna(0)
+        else:
+            print_colored(f"   Warning: 'Impr.' column not found in {label} PPC data", Colors.YELLOW)
+            impressions = 0
+        
+        # Check if date column exists
+        if self._ppc_frame_has_date(raw_df):
+            date_col = 'Date' if 'Date' in raw_df.columns else 'date'
+            # Parse straight to UTC (naive dates are treated as UTC) so both exports
+            # concatenate into one datetime64 column, even with mixed offsets
+            dates = pd.to_datetime(raw_df[date_col], errors='coerce', utc=True)
+            print_colored(f"   ✓ Date column found in {label} PPC data", Colors.GREEN)
+        else:
+            print_colored(f"   Warning: PPC {campaign_type} data has no date column - time-based attribution disabled", Colors.YELLOW)
+            dates = pd.NaT
+        
+        return pd.DataFrame({
+            'keyword': raw_df[keyword_col],
+            'clicks': clicks,
+            'impressions': impressions,
+            'campaign_type': pd.Categorical([campaign_type] * len(raw_df), categories=PPC_CAMPAIGN_TYPES),
+            'date': dates,
+        }, index=raw_df.index)
+
     def process_ppc_data(self):
         """Process and combine PPC campaign data"""
         if self.ppc_standard_df.empty and self.ppc_dynamic_df.empty:
@@ -888,92 +1421,18 @@ class LeadAttributionAnalyzer:
 
         # Process standard campaign data
         if not self.ppc_standard_df.empty:
-            print_colored(f"   Processing PPC Standard data - columns: {list(self.ppc_standard_df.columns)}", Colors.BLUE)
-            
-            # Create a copy and process standard PPC data
-            standard_df = self.ppc_standard_df.copy()
-            
-            # Map columns properly - use actual column names from the DataFrame
-            if 'Keyword' in standard_df.columns:
-                standard_df['keyword'] = standard_df['Keyword']
-            else:
-                print_colored("   Warning: 'Keyword' column not found in standard PPC data", Colors.YELLOW)
+            standard_df = self._normalize_ppc_frame(self.ppc_standard_df, 'Keyword', 'Standard')
+            if standard_df is None:
                 return
-            
-            if 'Clicks' in standard_df.columns:
-                standard_df['clicks'] = pd.to_numeric(standard_df['Clicks'], errors='coerce').fillna(0)
-            else:
-                print_colored("   Warning: 'Clicks' column not found in standard PPC data", Colors.YELLOW)
-                standard_df['clicks'] = 0
-            
-            if 'Impr.' in standard_df.columns:
-                # Handle impressions with commas
-                standard_df['impressions'] = pd.to_numeric(
-                    standard_df['Impr.'].astype(str).str.replace(',', ''), 
-                    errors='coerce'
-                ).fillna(0)
-            else:
-                print_colored("   Warning: 'Impr.' column not found in standard PPC data", Colors.YELLOW)
-                standard_df['impressions'] = 0
-            
-            # Add campaign type
-            standard_df['campaign_type'] = 'Standard'
-            
-            # Check if date column exists
-            if 'Date' in standard_df.columns or 'date' in standard_df.columns:
-                date_col = 'Date' if 'Date' in standard_df.columns else 'date'
-                standard_df['date'] = pd.to_datetime(standard_df[date_col], errors='coerce')
-                has_date_data = True
-                print_colored("   ✓ Date column found in standard PPC data", Colors.GREEN)
-            else:
-                print_colored("   Warning: PPC Standard data has no date column - time-based attribution disabled", Colors.YELLOW)
-                standard_df['date'] = pd.NaT
-                
+            has_date_data = has_date_data or self._ppc_frame_has_date(self.ppc_standard_df)
             frames_to_concat.append(standard_df)
 
-        # Process dynamic campaign data
+        # Process dynamic campaign data - dynamic uses 'Dynamic ad target' instead of 'Keyword'
         if not self.ppc_dynamic_df.empty:
-            print_colored(f"   Processing PPC Dynamic data - columns: {list(self.ppc_dynamic_df.columns)}", Colors.BLUE)
-            
-            # Create a copy and process dynamic PPC data
-            dynamic_df = self.ppc_dynamic_df.copy()
-            
-            # Map columns properly - dynamic uses 'Dynamic ad target' instead of 'Keyword'
-            if 'Dynamic ad target' in dynamic_df.columns:
-                dynamic_df['keyword'] = dynamic_df['Dynamic ad target']
-            else:
-                print_colored("   Warning: 'Dynamic ad target' column not found in dynamic PPC data", Colors.YELLOW)
+            dynamic_df = self._normalize_ppc_frame(self.ppc_dynamic_df, 'Dynamic ad target', 'Dynamic')
+            if dynamic_df is None:
                 return
-            
-            if 'Clicks' in dynamic_df.columns:
-                dynamic_df['clicks'] = pd.to_numeric(dynamic_df['Clicks'], errors='coerce').fillna(0)
-            else:
-                print_colored("   Warning: 'Clicks' column not found in dynamic PPC data", Colors.YELLOW)
-                dynamic_df['clicks'] = 0
-            
-            if 'Impr.' in dynamic_df.columns:
-                # Handle impressions with commas
-                dynamic_df['impressions'] = pd.to_numeric(
-                    dynamic_df['Impr.'].astype(str).str.replace(',', ''), 
-                    errors='coerce'
-                ).fillna(0)
-            else:
-                print_colored("   Warning: 'Impr.' column not found in dynamic PPC data", Colors.YELLOW)
-                dynamic_df['impressions'] = 0
-            
-            # Add campaign type
-            dynamic_df['campaign_type'] = 'Dynamic'
-            
-            # Check if date column exists
-            if 'Date' in dynamic_df.columns or 'date' in dynamic_df.columns:
-                date_col = 'Date' if 'Date' in dynamic_df.columns else 'date'
-                dynamic_df['date'] = pd.to_datetime(dynamic_df[date_col], errors='coerce')
-                has_date_data = True
-                print_colored("   ✓ Date column found in dynamic PPC data", Colors.GREEN)
-            else:
-                print_colored("   Warning: PPC Dynamic data has no date column - time-based attribution disabled", Colors.YELLOW)
-                dynamic_df['date'] = pd.NaT
-                
+            has_date_data = has_date_data or self._ppc_frame_has_date(self.ppc_dynamic_df)
             frames_to_concat.append(dynamic_df)
 
         # Combine only the common columns we have
@@ -1019,20 +1478,84 @@ class LeadAttributionAnalyzer:
                 self.combined_ppc_df['day_of_week'] = 'Unknown'
                 self.combined_ppc_df['hour_of_day'] = 0
                 print_colored("   ✓ PPC data processed without date information", Colors.YELLOW)
+
+            # Dates are UTC already unless a frame had none (its NaT column makes the
+            # concatenation object dtype); normalize once so attribution can compare directly
+            if 'date' in self.combined_ppc_df.columns and not isinstance(self.combined_ppc_df['date'].dtype, pd.DatetimeTZDtype):
+                self.combined_ppc_df['date'] = pd.to_datetime(self.combined_ppc_df['date'], errors='coerce', utc=True)
             
             # Filter out rows with no clicks
             before_filter = len(self.combined_ppc_df)
-            self.combined_ppc_df = self.combined_ppc_df[self.combined_ppc_df['clicks'] > 0]
+            self.combined_ppc_df = downcast_counts(self.combined_ppc_df[self.combined_ppc_df['clicks'] > 0].copy())
             after_filter = len(self.combined_ppc_df)
             
             if before_filter != after_filter:
                 print_colored(f"   Filtered out {before_filter - after_filter} PPC entries with zero clicks", Colors.BLUE)
             
             print_colored(f"✓ Final PPC dataset: {len(self.combined_ppc_df)} entries with clicks", Colors.GREEN)
+            
+            # Pre-group by keyword once so attribution can do hash lookups instead of row scans
+            self.get_ppc_by_keyword()
         else:
             print_colored("   Warning: No valid PPC data frames to combine", Colors.YELLOW)
             self.combined_ppc_df = pd.DataFrame()
 
+    def get_ppc_by_keyword(self) -> pd.DataFrame:
+        """
+        PPC clicks/impressions aggregated per keyword, indexed by keyword.
+        
+        Built once per combined_ppc_df and rebuilt if that frame is replaced.
+        """
+        if self._ppc_by_keyword is not None and self._ppc_by_keyword_source is self.combined_ppc_df:
+            return self._ppc_by_keyword
+        
+        if self.combined_ppc_df is None or self.combined_ppc_df.empty or 'keyword' not in self.combined_ppc_df.columns:
+            self._ppc_by_keyword = pd.DataFrame(columns=['clicks', 'impressions', 'campaign_type'])
+        else:
+            agg_spec = {'clicks': 'sum'}
+            if 'impressions' in self.combined_ppc_df.columns:
+                agg_spec['impressions'] = 'sum'
+            if 'campaign_type' in self.combined_ppc_df.columns:
+                agg_spec['campaign_type'] = 'first'
+            keywords = self.combined_ppc_df['keyword'].astype(str).str.lower()
+            self._ppc_by_keyword = self.combined_ppc_df.groupby(keywords, sort=False, observed=True).agg(agg_spec)
+        
+        self._ppc_by_keyword_source = self.combined_ppc_df
+        return self._ppc_by_keyword
+
+    def get_ppc_keyword_terms(self) -> Tuple[List[Tuple[List[str], List[int]]], List[str]]:
+        """
+        Tokenized PPC keywords: per combined_ppc_df row, its terms and their ids, plus
+        the list of distinct terms the ids index into.
+        
+        Each distinct keyword is tokenized once; the result is kept until combined_ppc_df
+        is replaced. Rows without clicks are never matched, so they get no terms and their
+        keywords stay out of the term list that leads are scored against.
+        """
+        if self._ppc_keyword_terms is not None and self._ppc_keyword_terms_source is self.combined_ppc_df:
+            return self._ppc_keyword_terms
+        
+        term_columns = {}
+        keyword_terms = {}
+        ppc_row_terms = []
+        if self.combined_ppc_df is not None and 'keyword' in self.combined_ppc_df.columns:
+            if 'clicks' in self.combined_ppc_df.columns:
+                row_active = (self.combined_ppc_df['clicks'] > 0).tolist()
+            else:
+                row_active = [True] * len(self.combined_ppc_df)
+            for ppc_keyword, active in zip(self.combined_ppc_df['keyword'].tolist(), row_active):
+                if not active:
+                    ppc_row_terms.append(([], []))
+                    continue
+                if ppc_keyword not in keyword_terms:
+                    terms = self.extract_keywords_from_text(str(ppc_keyword).lower())
+                    keyword_terms[ppc_keyword] = (terms, [term_columns.setdefault(term, len(term_columns)) for term in terms])
+                ppc_row_terms.append(keyword_terms[ppc_keyword])
+        
+        self._ppc_keyword_terms = (ppc_row_terms, list(term_columns))
+        self._ppc_keyword_terms_source = self.combined_ppc_df
+        return self._ppc_keyword_terms
+
     def create_mock_ppc_data(self, campaign_type: str) -> pd.DataFrame:
         """Create mock PPC data for testing"""
         mock_data = []
@@ -1075,6 +1598,12 @@ class LeadAttributionAnalyzer:
             'umbrellas': ['umbrella', 'parasol', 'rain protection'],
             'promotional': ['promotional', 'corporate', 'branded', 'custom']
         }
+        # One alternation per category, in category order, so a single scan per
+        # category replaces the substring test for each of its terms
+        self._product_category_patterns = [
+            (category, re.compile('|'.join(re.escape(term) for term in terms)))
+            for category, terms in self.product_keyword_map.items()
+        ]
 
     def extract_product_category_from_keyword(self, keyword: str) -> str:
         """Extract product category from keyword text"""
@@ -1083,41 +1612,69 @@ class LeadAttributionAnalyzer:
 
         keyword = keyword.lower()
 
-        # Check each product category's keywords for matches
-        for category, terms in self.product_keyword_map.items():
-            for term in terms:
-                if term in keyword:
-                    return category
+        # The first category with any term in the keyword wins
+        for category, pattern in self._product_category_patterns:
+            if pattern.search(keyword):
+                return category
 
         return 'other'
 
+    def categorize_keywords(self, keywords: pd.Series) -> pd.Series:
+        """Product category of each keyword, classifying every distinct keyword once"""
+        codes, distinct_keywords = pd.factorize(keywords)
+        # Code -1 (missing keyword) picks the trailing 'other'
+        categories = np.array(
+            [self.extract_product_category_from_keyword(keyword) for keyword in distinct_keywords] + ['other'],
+            dtype=object
+        )
+        return pd.Series(categories[codes], index=keywords.index)
+
     def run_attribution(self) -> pd.DataFrame:
         """Run the full attribution process"""
         print_colored("Starting attribution analysis...", Colors.BOLD + Colors.BLUE)
+        self._stats_cache = None
         
         total_steps = 7 if self.use_ga4 else 6
         
-        # Step 1: Identify direct traffic (returning customers)
-        self.display_progress_bar(1, total_steps, "Direct Traffic")
-        self.identify_direct_traffic()
-
-        # Step 2: Identify SEO traffic
-        self.display_progress_bar(2, total_steps, "SEO Traffic")
-        self.identify_seo_traffic()
-
-        # Step 3: Identify potential referrals
-        self.display_progress_bar(3, total_steps, "Referral Traffic")
-        self.identify_referrals()
-
-        # Step 4: Identify PPC traffic
-        self.display_progress_bar(4, total_steps, "PPC Traffic")
-        self.identify_ppc_traffic()
-
-        # Step 5: GA4 validation (if enabled)
+        # The GA4 pull is network-bound and only needed for validation, so fetch it
+        # in the background while the local attribution steps run. The steps
+        # themselves stay sequential: each one only considers leads left
+        # unattributed by the higher-priority steps before it.
+        ga4_executor = None
+        ga4_future = None
         if self.use_ga4:
-            self.display_progress_bar(5, total_steps, "GA4 Validation")
-            self.load_ga4_traffic_patterns()
-            self.validate_attribution_with_ga4()
+            ga4_executor = ThreadPoolExecutor(max_workers=1)
+            ga4_future = ga4_executor.submit(
+                self.load_ga4_traffic_patterns, self.leads_df['first_ticket_date'].copy()
+            )
+        
+        try:
+            # Step 1: Identify direct traffic (returning customers)
+            self.display_progress_bar(1, total_steps, "Direct Traffic")
+            self.identify_direct_traffic()
+
+            # Step 2: Identify SEO traffic
+            self.display_progress_bar(2, total_steps, "SEO Traffic")
+            self.identify_seo_traffic()
+
+            # Step 3: Identify potential referrals
+            self.display_progress_bar(3, total_steps, "Referral Traffic")
+            self.identify_referrals()
+
+            # Step 4: Identify PPC traffic
+            self.display_progress_bar(4, total_steps, "PPC Traffic")
+            self.identify_ppc_traffic()
+
+            # Step 5: GA4 validation (if enabled)
+            if self.use_ga4:
+                self.display_progress_bar(5, total_steps, "GA4 Validation")
+                ga4_future.result()
+                self.validate_attribution_with_ga4()
+        finally:
+            # Release the GA4 worker even when an earlier step raises; a pull that
+            # hasn't started yet is cancelled rather than left running
+            if ga4_executor is not None:
+                ga4_executor.shutdown(wait=False, cancel_futures=True)
 
         # Step 6: Email content analysis for attribution overrides
         step_num = 6 if self.use_ga4 else 5
@@ -1136,9 +1693,6 @@ class LeadAttributionAnalyzer:
         print_colored("Identifying direct traffic using cached QuickBooks customer data...", Colors.BLUE)
 
         # Performance tracking - Start timing customer cache loading
-        import time
-        import sys
-        
         cache_load_start = time.time()
         customer_cache = {}
         convert_qb_date_func = None
@@ -1214,6 +1768,8 @@ class LeadAttributionAnalyzer:
         direct_count = 0
         returning_customer_count = 0
         fallback_count = 0
+        # Matched leads per data_source, written to leads_df in one batch per source after the loop
+        direct_hits = defaultdict(lambda: ([], [], []))
 
         # Performance tracking - Start timing lead processing
         leads_processing_start = time.time()
@@ -1225,10 +1781,33 @@ class LeadAttributionAnalyzer:
         cache_lookup_errors = 0
         successful_cache_lookups = 0
         
-        for idx, lead in self.leads_df.iterrows():
+        # Customer-list membership for the fallback paths: one vectorized isin against the
+        # customer_emails Index, done the first time a fallback needs it (most runs never do)
+        customer_email_mask = None
+
+        def is_listed_customer(idx) -> bool:
+            nonlocal customer_email_mask
+            if customer_email_mask is None:
+                if hasattr(self, 'customer_emails'):
+                    customer_email_mask = self.leads_df['email'].astype(str).str.lower().str.strip().isin(self.customer_emails)
+                else:
+                    customer_email_mask = pd.Series(False, index=self.leads_df.index)
+            return bool(customer_email_mask[idx])
+        
+        # Format inquiry timestamps for attribution details once, outside the loop
+        try:
+            inquiry_time_strings = self.leads_df['first_inquiry_timestamp'].dt.strftime('%Y-%m-%d %H:%M')
+        except AttributeError:
+            inquiry_time_strings = self.leads_df['first_inquiry_timestamp'].map(
+                lambda ts: ts.strftime('%Y-%m-%d %H:%M') if pd.notna(ts) else None
+            )
+        
+        # Only the email and timestamp are needed per lead, so iterate plain column lists
+        # rather than building a Series per row
+        lead_emails = self.leads_df['email'].tolist() if 'email' in self.leads_df.columns else [''] * total_leads
+        for idx, email, inquiry_timestamp in zip(self.leads_df.index, lead_emails,
+                                                 self.leads_df['first_inquiry_timestamp'].tolist()):
             try:
-                email = lead.get('email', '')
-                inquiry_timestamp = lead.get('first_inquiry_timestamp')
                 
                 # Skip if no email or timestamp
                 if not email or pd.isna(inquiry_timestamp):
@@ -1265,9 +1844,6 @@ class LeadAttributionAnalyzer:
                     cache_lookup_errors += 1
                     continue
                 
-                # Log checking against cached data
-                print_colored(f"Checking {email_to_check} against cached data: customer since {creation_date_str}", Colors.BLUE)
-                
                 try:
                     # Convert QuickBooks date to datetime with error handling
                     if convert_qb_date_func is None:
@@ -1294,22 +1870,13 @@ class LeadAttributionAnalyzer:
                     # Compare customer_cache[email] with lead inquiry date
                     is_existing_customer = creation_date < inquiry_timestamp
                     
-                    time_diff = inquiry_timestamp - creation_date
-                    print_colored(
-                        f"✓ {email_to_check}: Created {creation_date.strftime('%Y-%m-%d %H:%M')}, "
-                        f"Inquiry {inquiry_timestamp.strftime('%Y-%m-%d %H:%M')}, "
-                        f"Gap: {time_diff.days} days, "
-                        f"Existing: {is_existing_customer}", 
-                        Colors.GREEN if is_existing_customer else Colors.BLUE
-                    )
-                    
                     if is_existing_customer:
                         # Customer existed BEFORE inquiry - this is genuine direct traffic
-                        inquiry_date_str = inquiry_timestamp.strftime('%Y-%m-%d %H:%M')
-                        self.leads_df.loc[idx, 'attributed_source'] = 'Direct'
-                        self.leads_df.loc[idx, 'attribution_confidence'] = 95
-                        self.leads_df.loc[idx, 'attribution_detail'] = f'Verified returning customer (existed before {inquiry_date_str})'
-                        self.leads_df.loc[idx, 'data_source'] = 'quickbooks_cached'
+                        inquiry_date_str = inquiry_time_strings[idx]
+                        hit_idx, hit_conf, hit_detail = direct_hits['quickbooks_cached']
+                        hit_idx.append(idx)
+                        hit_conf.append(95)
+                        hit_detail.append(f'Verified returning customer (existed before {inquiry_date_str})')
                         
                         direct_count += 1
                         returning_customer_count += 1
@@ -1326,14 +1893,14 @@ class LeadAttributionAnalyzer:
                     
                     # Fallback: basic email list check (less reliable)
                     try:
-                        if hasattr(self, 'customer_emails') and email_to_check in self.customer_emails:
+                        if is_listed_customer(idx):
                             print_colored(f"  → Using fallback customer list check for {email_to_check}", Colors.YELLOW)
                             
-                            inquiry_date_str = inquiry_timestamp.strftime('%Y-%m-%d %H:%M') if pd.notna(inquiry_timestamp) else "unknown"
-                            self.leads_df.loc[idx, 'attributed_source'] = 'Direct'
-                            self.leads_df.loc[idx, 'attribution_confidence'] = 50  # Lower confidence due to date processing failure
-                            self.leads_df.loc[idx, 'attribution_detail'] = f'Customer email match (date processing failed at {inquiry_date_str})'
-                            self.leads_df.loc[idx, 'data_source'] = 'customer_db_fallback'
+                            inquiry_date_str = inquiry_time_strings[idx] or "unknown"
+                            hit_idx, hit_conf, hit_detail = direct_hits['customer_db_fallback']
+                            hit_idx.append(idx)
+                            hit_conf.append(50)  # Lower confidence due to date processing failure
+                            hit_detail.append(f'Customer email match (date processing failed at {inquiry_date_str})')
                             
                             direct_count += 1
                             fallback_count += 1
@@ -1349,13 +1916,13 @@ class LeadAttributionAnalyzer:
                     
                     # Attempt basic fallback if possible
                     try:
-                        if hasattr(self, 'customer_emails') and email_to_check in self.customer_emails:
+                        if is_listed_customer(idx):
                             print_colored(f"  → Emergency fallback for {email_to_check}", Colors.YELLOW)
                             
-                            self.leads_df.loc[idx, 'attributed_source'] = 'Direct'
-                            self.leads_df.loc[idx, 'attribution_confidence'] = 40  # Low confidence due to processing failure
-                            self.leads_df.loc[idx, 'attribution_detail'] = f'Customer email match (processing failed, emergency fallback)'
-                            self.leads_df.loc[idx, 'data_source'] = 'customer_db_emergency'
+                            hit_idx, hit_conf, hit_detail = direct_hits['customer_db_emergency']
+                            hit_idx.append(idx)
+                            hit_conf.append(40)  # Low confidence due to processing failure
+                            hit_detail.append(f'Customer email match (processing failed, emergency fallback)')
                             
                             direct_count += 1
                             fallback_count += 1
@@ -1371,6 +1938,9 @@ class LeadAttributionAnalyzer:
                 cache_lookup_errors += 1
                 continue
 
+        for data_source, (hit_idx, hit_conf, hit_detail) in direct_hits.items():
+            self._assign_attributions('Direct', hit_idx, hit_conf, hit_detail, data_source=data_source)
+
         # Performance tracking - Calculate lead processing time
         leads_processing_time = time.time() - leads_processing_start
         
@@ -1414,8 +1984,10 @@ class LeadAttributionAnalyzer:
         print_colored("=" * 60, Colors.BLUE)
         
         # Summary logging with error context
+        leads_with_timestamp = int(self.leads_df['first_inquiry_timestamp'].notna().sum())
         print_colored(f"✓ Direct traffic identification completed:", Colors.GREEN)
         print_colored(f"  - Total Direct leads: {direct_count} ({direct_count/len(self.leads_df)*100:.1f}%)", Colors.GREEN)
+        print_colored(f"  - Leads with inquiry timestamps checked: {leads_with_timestamp}/{total_leads}", Colors.BLUE)
         
         if returning_customer_count > 0:
             print_colored(f"  - Verified returning customers: {returning_customer_count}", Colors.GREEN)
@@ -1438,20 +2010,104 @@ class LeadAttributionAnalyzer:
             print_colored("🔄 Attribution system will continue with other traffic sources (SEO, PPC, Referral)", Colors.BLUE)
             print_colored("💡 Other attribution methods are not affected by customer cache issues", Colors.BLUE)
 
+    def _unattributed_rows(self) -> np.ndarray:
+        """Positions of the leads not yet attributed to any source"""
+        return np.flatnonzero((self.leads_df['attributed_source'] == 'Unknown').to_numpy())
+
+    @staticmethod
+    def _clicked_gsc_queries(gsc_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        The GSC rows with clicks, renumbered from 0.
+
+        Queries with no clicks carry no real traffic evidence, so they are dropped once
+        here rather than scored against every lead and skipped pair by pair.
+        """
+        scoring_columns = [column for column in ('query', 'clicks', 'impressions', 'position', 'ctr') if column in gsc_data.columns]
+        return gsc_data.loc[gsc_data['clicks'] != 0, scoring_columns].reset_index(drop=True)
+
+    def _score_lead_keywords(self, lead_rows: np.ndarray, choices: List[str], fallback: str = 'substring') -> Tuple[List[np.ndarray], np.ndarray]:
+        """
+        Score the distinct extracted keywords of the leads at lead_rows against choices in one batch.
+        
+        Returns, per lead in order, the matrix rows of its keywords, and the
+        keyword x choice similarity matrix.
+        """
+        lead_keyword_ids = self._get_lead_keyword_ids().iloc[lead_rows].tolist()
+        
+        # Compact the vocabulary down to the keywords these leads actually use
+        used_ids = np.unique(np.concatenate(lead_keyword_ids)) if lead_keyword_ids else np.array([], dtype=np.int32)
+        id_rows = np.full(len(self._keyword_vocab), -1, dtype=np.int32)
+        id_rows[used_ids] = np.arange(len(used_ids), dtype=np.int32)
+        lead_keyword_rows = [id_rows[keyword_ids] for keyword_ids in lead_keyword_ids]
+        
+        vocab_keywords = list(self._keyword_vocab)
+        similarity_matrix = keyword_similarity_matrix(
+            [vocab_keywords[i] for i in used_ids],
+            choices,
+            fallback,
+            keyword_keys=[self._keyword_vocab_keys[i] for i in used_ids]
+        )
+        return lead_keyword_rows, similarity_matrix
+
+    def _build_keyword_vocabulary(self):
+        """
+        Encode extracted lead keywords as int32 ids into one vocabulary.
+        
+        Each distinct keyword is normalized for fuzzy matching once; every lead gets an
+        array of its keyword ids, aligned with leads_df.
+        """
+        vocab = {}
+        vocab_keys = []
+        lead_keyword_ids = []
+        keyword_lists = self.leads_df['extracted_keywords'] if 'extracted_keywords' in self.leads_df.columns else [None] * len(self.leads_df)
+        
+        for lead_keywords in keyword_lists:
+            if not lead_keywords:
+                lead_keyword_ids.append(np.array([], dtype=np.int32))
+                continue
+            keyword_ids = []
+            for lead_kw in lead_keywords:
+                if lead_kw not in vocab:
+                    vocab[lead_kw] = len(vocab)
+                    vocab_keys.append(token_sort_key(lead_kw))
+                keyword_ids.append(vocab[lead_kw])
+            lead_keyword_ids.append(np.array(keyword_ids, dtype=np.int32))
+        
+        self._keyword_vocab = vocab
+        self._keyword_vocab_keys = vocab_keys
+        self._lead_keyword_ids = pd.Series(lead_keyword_ids, index=self.leads_df.index, dtype=object)
+
+    def _get_lead_keyword_ids(self) -> pd.Series:
+        """Per-lead keyword id arrays, building the vocabulary if leads_df changed since the last build"""
+        if self._lead_keyword_ids is None or not self._lead_keyword_ids.index.equals(self.leads_df.index):
+            self._build_keyword_vocabulary()
+        return self._lead_keyword_ids
+
     def identify_seo_traffic(self):
         """Identify traffic from SEO using GSC data first, then CSV fallback"""
         print_colored("Identifying SEO traffic...", Colors.BLUE)
         
+        # Keep the keyword score memo bounded to a single attribution run
+        cached_token_sort_ratio.cache_clear()
+        
+        # Encode and normalize lead keywords once; every attribute_using_* pass below reuses them
+        self._build_keyword_vocabulary()
+        
+        # Leads the primary method scores, kept for the comparison pass
+        unattributed_rows = self._unattributed_rows()
+        
         # First try enhanced GSC data (real clicks with keyword matching)
         if self.gsc_keywords_df is not None and not self.gsc_keywords_df.empty:
             print_colored("Using enhanced GSC data for SEO attribution (real click data)", Colors.BLUE)
             seo_count = self.attribute_using_enhanced_gsc_data()
             self._update_data_source_for_seo('gsc_enhanced')
+            primary_method = 'gsc'
         # Fall back to raw GSC data
         elif self.gsc_data is not None and not self.gsc_data.empty:
             print_colored("Using raw GSC data for SEO attribution (real click data)", Colors.BLUE)
             seo_count = self.attribute_using_gsc_data()
             self._update_data_source_for_seo('gsc_api')
+            primary_method = 'gsc'
         # Fall back to CSV ranking data
         else:
             print_colored("Using CSV data for SEO attribution (ranking data)", Colors.BLUE)
@@ -1462,34 +2118,32 @@ class LeadAttributionAnalyzer:
                 
             seo_count = self.attribute_using_seo_csv()
             self._update_data_source_for_seo('seo_csv')
+            primary_method = 'csv'
 
         # If comparison mode is enabled, run both methods
         if self.compare_methods and self.seo_keywords_df is not None and not self.seo_keywords_df.empty and self.gsc_data is not None and not self.gsc_data.empty:
             print_colored("Comparison mode: Running both CSV and GSC attribution methods", Colors.BLUE)
             
-            # Store current results as primary method
+            # Store current results under the method that produced them
             current_seo_mask = self.leads_df['attributed_source'] == 'SEO'
-            primary_method = 'gsc' if self.gsc_keywords_df is not None and not self.gsc_keywords_df.empty else 'csv'
             
             self.leads_df.loc[current_seo_mask, f'{primary_method}_attribution'] = 'SEO'
             self.leads_df.loc[current_seo_mask, f'{primary_method}_confidence'] = self.leads_df.loc[current_seo_mask, 'attribution_confidence']
             
-            # Reset and run secondary method
-            self.leads_df.loc[current_seo_mask, 'attributed_source'] = 'Unknown'
-            self.leads_df.loc[current_seo_mask, 'attribution_confidence'] = 0
-            
-            # Run the other method
+            # Score the other method on the same leads; the primary attribution stays authoritative
             if primary_method == 'gsc':
-                secondary_count = self.attribute_using_seo_csv()
+                hit_idx, hit_conf, _ = self._match_seo_csv(unattributed_rows)
                 secondary_method = 'csv'
             else:
-                secondary_count = self.attribute_using_enhanced_gsc_data() if self.gsc_keywords_df is not None else self.attribute_using_gsc_data()
+                if self.gsc_keywords_df is not None and not self.gsc_keywords_df.empty:
+                    hit_idx, hit_conf, _ = self._match_enhanced_gsc_data(unattributed_rows)
+                else:
+                    hit_idx, hit_conf, _ = self._match_gsc_data(unattributed_rows)
                 secondary_method = 'gsc'
             
             # Store secondary results
-            secondary_seo_mask = self.leads_df['attributed_source'] == 'SEO'
-            self.leads_df.loc[secondary_seo_mask, f'{secondary_method}_attribution'] = 'SEO'
-            self.leads_df.loc[secondary_seo_mask, f'{secondary_method}_confidence'] = self.leads_df.loc[secondary_seo_mask, 'attribution_confidence']
+            self.leads_df.loc[hit_idx, f'{secondary_method}_attribution'] = 'SEO'
+            self.leads_df.loc[hit_idx, f'{secondary_method}_confidence'] = hit_conf
 
     def _identify_seo_from_gsc(self) -> int:
         """
@@ -1501,8 +2155,9 @@ class LeadAttributionAnalyzer:
             return 0
             
         # Only consider leads not already attributed
-        unattributed_mask = self.leads_df['attributed_source'] == 'Unknown'
+        unattributed_rows = self._unattributed_rows()
         seo_count = 0
+        hit_idx, hit_conf, hit_detail = [], [], []
 
         # Get date range for GSC data based on lead timestamps
         if 'first_inquiry_timestamp' in self.leads_df.columns:
@@ -1532,100 +2187,68 @@ class LeadAttributionAnalyzer:
             return 0
 
         print_colored(f"✓ Retrieved {len(gsc_data)} search queries with {gsc_data['clicks'].sum()} total clicks", Colors.GREEN)
-
-        # Loop through unattributed leads
-        for idx, lead in self.leads_df[unattributed_mask].iterrows():
-            lead_keywords = lead.get('extracted_keywords', [])
-            
-            if not lead_keywords:
-                continue
-
-            # Match lead keywords with GSC queries
-            keyword_match_score = 0
-            matched_queries = []
-            total_clicks = 0
-            total_impressions = 0
-            best_position = 100
-
-            for _, gsc_row in gsc_data.iterrows():
-                gsc_query = str(gsc_row['query']).lower()
-                gsc_clicks = gsc_row['clicks']
-                gsc_impressions = gsc_row['impressions']
-                gsc_position = gsc_row['position']
-                
-                # Skip queries with no clicks
-                if gsc_clicks == 0:
-                    continue
-
-                for lead_kw in lead_keywords:
-                    # Use fuzzy matching if available
-                    if FUZZY_AVAILABLE:
-                        similarity = fuzz.token_sort_ratio(lead_kw, gsc_query)
-                    else:
-                        similarity = 100 if lead_kw in gsc_query else 0
-                    
-                    if similarity > 60:  # Match threshold
-                        # Weight by actual clicks (real traffic evidence)
-                        click_weight = min(100, gsc_clicks * 10)  # Scale clicks to 0-100
-                        position_bonus = max(0, (20 - gsc_position) * 2)  # Better positions get bonus
-                        
-                        match_score = (similarity * 0.4) + (click_weight * 0.4) + (position_bonus * 0.2)
-                        
-                        keyword_match_score = max(keyword_match_score, match_score)
-                        matched_queries.append((lead_kw, gsc_query, similarity, gsc_clicks))
-                        total_clicks += gsc_clicks
-                        total_impressions += gsc_impressions
-                        best_position = min(best_position, gsc_position)
-
-            # Calculate GSC-based confidence score
-            if keyword_match_score > 0 and total_clicks > 0:
-                # Base score from keyword matching
-                base_confidence = keyword_match_score
-                
-                # Boost confidence based on actual clicks (real traffic evidence)
-                click_confidence_boost = min(30, total_clicks * 5)  # Up to 30 points for clicks
-                
-                # Position quality bonus
-                if best_position <= 3:
-                    position_bonus = 20
-                elif best_position <= 10:
-                    position_bonus = 10
-                elif best_position <= 20:
-                    position_bonus = 5
-                else:
-                    position_bonus = 0
-
-                # Time proximity bonus (if we have timestamp data)
-                time_bonus = 0
-                if 'first_inquiry_timestamp' in lead and pd.notna(lead['first_inquiry_timestamp']):
-                    lead_date = lead['first_inquiry_timestamp']
-                    # Check if GSC data date is close to lead date
-                    if 'date' in gsc_data.columns:
-                        # Simple time proximity check (same week gets bonus)
-                        time_diff_days = abs((lead_date - pd.Timestamp(start_date)).days)
-                        if time_diff_days <= 7:
-                            time_bonus = 15
-                        elif time_diff_days <= 14:
-                            time_bonus = 10
-
-                # Final confidence calculation
-                confidence_score = base_confidence + click_confidence_boost + position_bonus + time_bonus
-                confidence_score = min(100, confidence_score)  # Cap at 100
-
-                # Use higher threshold for GSC attribution since we have real click data
-                threshold = self.confidence_thresholds['medium']  # 50% threshold
-
-                if confidence_score >= threshold:
-                    self.leads_df.loc[idx, 'attributed_source'] = 'SEO'
-                    self.leads_df.loc[idx, 'attribution_confidence'] = confidence_score
-
-                    matched_queries_str = '; '.join([f"{l}-{g}({c} clicks)" for l, g, s, c in matched_queries[:3]])
-                    detail = f"GSC matches: {matched_queries_str}, Total clicks: {total_clicks}, Best position: {best_position:.1f}"
-                    self.leads_df.loc[idx, 'attribution_detail'] = detail
-
-                    seo_count += 1
-
-        unattributed_count = unattributed_mask.sum()
+        gsc_data = downcast_counts(gsc_data)
+
+        # Skip queries with no clicks, then score all lead keywords against the rest in one batch
+        active_gsc = self._clicked_gsc_queries(gsc_data)
+        gsc_queries = lowercase_strings(active_gsc['query'])
+        gsc_clicks_list = active_gsc['clicks'].tolist()
+        lead_keyword_rows, similarity_matrix = self._score_lead_keywords(unattributed_rows, gsc_queries)
+
+        # Per-query parts of the match score, computed once as arrays
+        gsc_clicks = active_gsc['clicks'].to_numpy()
+        gsc_positions = active_gsc['position'].to_numpy()
+        click_terms = np.fmin(100, gsc_clicks * 10) * 0.4  # Weight by actual clicks, scaled to 0-100
+        position_terms = np.fmax(0, (20 - gsc_positions) * 2) * 0.2  # Better positions get bonus
+
+        unattributed_leads = self.leads_df.iloc[unattributed_rows]
+
+        # Time proximity bonus (if we have timestamp data), for every unattributed lead at once
+        lead_time_bonuses = np.zeros(len(unattributed_leads), dtype=int)
+        if 'first_inquiry_timestamp' in unattributed_leads.columns and 'date' in gsc_data.columns:
+            # Simple time proximity check (same week gets bonus); missing timestamps get none
+            time_diff_days = (unattributed_leads['first_inquiry_timestamp'] - pd.Timestamp(start_date)).dt.days.abs().to_numpy()
+            lead_time_bonuses = np.select([time_diff_days <= 7, time_diff_days <= 14], [15, 10], 0)
+
+        # Match lead keywords with GSC queries (match threshold 60) and aggregate per lead
+        matched, match_scores, (click_totals,), best_positions, _ = aggregate_keyword_matches(
+            lead_keyword_rows, similarity_matrix, 0.4, [click_terms, position_terms],
+            totals=(gsc_clicks,), lowest=gsc_positions
+        )
+        candidates = np.flatnonzero(matched)
+
+        # Calculate GSC-based confidence scores for all matched leads at once
+        match_scores = match_scores[candidates]
+        click_totals = click_totals[candidates]
+        best_positions = np.fmin(100, best_positions[candidates])
+        click_confidence_boost = np.fmin(30, click_totals * 5)  # Up to 30 points for clicks (real traffic evidence)
+        position_bonus = position_bonus_ladder(best_positions, (20, 10, 5))
+        time_bonuses = lead_time_bonuses[candidates]
+        confidence_scores = np.fmin(100, match_scores + click_confidence_boost + position_bonus + time_bonuses)  # Cap at 100
+
+        # Use higher threshold for GSC attribution since we have real click data
+        threshold = self.confidence_thresholds['medium']  # 50% threshold
+        passed = (match_scores > 0) & (click_totals > 0) & (confidence_scores >= threshold)
+
+        lead_keyword_lists = unattributed_leads['extracted_keywords']
+        for i in np.nonzero(passed)[0]:
+            lead_pos = candidates[i]
+            idx, lead_keywords = lead_keyword_lists.index[lead_pos], lead_keyword_lists.iloc[lead_pos]
+            # Matched pairs in query order then lead keyword order
+            q_hits, k_hits = np.nonzero(similarity_matrix[lead_keyword_rows[lead_pos]].T > 60)
+            hit_idx.append(idx)
+            hit_conf.append(confidence_scores[i])
+
+            matched_queries_str = '; '.join([f"{lead_keywords[k]}-{gsc_queries[q]}({gsc_clicks_list[q]} clicks)"
+                                             for q, k in zip(q_hits[:3].tolist(), k_hits[:3].tolist())])
+            detail = f"GSC matches: {matched_queries_str}, Total clicks: {click_totals[i]}, Best position: {best_positions[i]:.1f}"
+            hit_detail.append(detail)
+
+            seo_count += 1
+
+        self._assign_attributions('SEO', hit_idx, hit_conf, hit_detail)
+
+        unattributed_count = len(unattributed_rows)
         if unattributed_count > 0:
             print_colored(f"✓ Identified {seo_count} leads as SEO traffic using GSC data ({seo_count/unattributed_count*100:.1f}% of unattributed)", Colors.GREEN)
         
@@ -1633,237 +2256,266 @@ class LeadAttributionAnalyzer:
 
     def attribute_using_enhanced_gsc_data(self) -> int:
         """Attribute using enhanced GSC data with click summaries"""
+        # Only consider leads not already attributed
+        hit_idx, hit_conf, hit_detail = self._match_enhanced_gsc_data(self._unattributed_rows())
+        self._assign_attributions('SEO', hit_idx, hit_conf, hit_detail)
+        return len(hit_idx)
+
+    def _match_enhanced_gsc_data(self, unattributed_rows: np.ndarray) -> Tuple[List, List, List[str]]:
+        """
+        Score unattributed leads against enhanced GSC data with click summaries.
+        
+        Returns the matched lead index, confidence and detail lists without touching leads_df.
+        """
         if self.gsc_keywords_df is None or self.gsc_keywords_df.empty:
             print_colored("No enhanced GSC data available for attribution", Colors.YELLOW)
-            return 0
+            return [], [], []
             
-        # Only consider leads not already attributed
-        unattributed_mask = self.leads_df['attributed_source'] == 'Unknown'
         seo_count = 0
+        hit_idx, hit_conf, hit_detail = [], [], []
+
+        print_colored(f"Analyzing {len(unattributed_rows)} unattributed leads against {len(self.gsc_keywords_df)} enhanced GSC keywords", Colors.BLUE)
+
+        # Score all lead keywords against the GSC queries in one batch
+        gsc_queries = lowercase_strings(self.gsc_keywords_df['query'])
+        gsc_clicks_list = self.gsc_keywords_df['clicks'].tolist()
+        gsc_positions_list = self.gsc_keywords_df['position'].tolist()
+        any_query_has_clicks = any(clicks > 0 for clicks in gsc_clicks_list)
+        lead_keyword_rows, similarity_matrix = self._score_lead_keywords(unattributed_rows, gsc_queries)
+
+        # Per-query parts of the match score, computed once as arrays: much higher weight
+        # for queries with actual clicks, lower weight for impression-only queries
+        gsc_clicks = self.gsc_keywords_df['clicks'].to_numpy()
+        gsc_impressions = self.gsc_keywords_df['impressions'].to_numpy()
+        gsc_positions = self.gsc_keywords_df['position'].to_numpy()
+        query_has_clicks = gsc_clicks > 0
+        similarity_weights = np.where(query_has_clicks, 0.2, 0.4)
+        click_terms = np.where(
+            query_has_clicks,
+            np.fmin(100, gsc_clicks * 20) * 0.6,  # Even higher weight for enhanced data
+            np.fmin(50, gsc_impressions / 100) * 0.3
+        )
+        position_terms = np.where(
+            query_has_clicks,
+            np.fmax(0, (20 - gsc_positions) * 4) * 0.2,
+            np.fmax(0, (20 - gsc_positions) * 2) * 0.3
+        )
 
-        print_colored(f"Analyzing {unattributed_mask.sum()} unattributed leads against {len(self.gsc_keywords_df)} enhanced GSC keywords", Colors.BLUE)
-
-        # Loop through unattributed leads
-        for idx, lead in self.leads_df[unattributed_mask].iterrows():
-            lead_keywords = lead.get('extracted_keywords', [])
+        # Match lead keywords with enhanced GSC data (match threshold 60) and aggregate per lead
+        matched, match_scores, (click_totals, impression_totals), best_positions, _ = aggregate_keyword_matches(
+            lead_keyword_rows, similarity_matrix, similarity_weights, [click_terms, position_terms],
+            totals=(gsc_clicks, gsc_impressions), lowest=gsc_positions
+        )
+        candidates = np.flatnonzero(matched)
+
+        # Calculate enhanced GSC-based confidence scores for all matched leads at once
+        match_scores = match_scores[candidates]
+        click_totals = click_totals[candidates]
+        impression_totals = impression_totals[candidates]
+        best_positions = np.fmin(100, best_positions[candidates])
+        
+        # Major boost for actual clicks (real traffic evidence), lower boost for impressions only
+        with_clicks = any_query_has_clicks & (click_totals > 0)
+        click_confidence_boost = np.where(with_clicks, np.fmin(50, click_totals * 10), np.fmin(20, impression_totals / 100))
+        data_quality_bonus = np.where(with_clicks, 20, 5)  # Bonus for having real click data
+        position_bonus = position_bonus_ladder(best_positions, (30, 20, 10))
+        
+        # Final confidence calculation - much higher for enhanced data
+        confidence_scores = np.fmin(100, match_scores + click_confidence_boost + position_bonus + data_quality_bonus)
+
+        # Use medium threshold for enhanced GSC data
+        threshold = self.confidence_thresholds['medium']  # 50% threshold
+        passed = (match_scores > 0) & (confidence_scores >= threshold)
+
+        lead_keyword_lists = self.leads_df['extracted_keywords'].iloc[unattributed_rows]
+        for i in np.nonzero(passed)[0]:
+            lead_pos = candidates[i]
+            idx, lead_keywords = lead_keyword_lists.index[lead_pos], lead_keyword_lists.iloc[lead_pos]
+            # Matched pairs in query order then lead keyword order
+            q_hits, k_hits = np.nonzero(similarity_matrix[lead_keyword_rows[lead_pos]].T > 60)
+            hit_idx.append(idx)
+            hit_conf.append(confidence_scores[i])
+
+            # Create detailed attribution description
+            matched_queries = [(lead_keywords[k], gsc_queries[q], gsc_clicks_list[q], gsc_positions_list[q])
+                               for q, k in zip(q_hits.tolist(), k_hits.tolist())]
+            top_matches = sorted(matched_queries, key=lambda x: x[2], reverse=True)[:3]  # Sort by clicks
+            matched_queries_str = '; '.join([f"{l}→{g}({c} clicks, pos {p:.1f})" for l, g, c, p in top_matches])
+            
+            if any_query_has_clicks:
+                detail = f"Enhanced GSC (with clicks): {matched_queries_str} | Total: {click_totals[i]} clicks, {impression_totals[i]} impr, Best pos: {best_positions[i]:.1f}"
+            else:
+                detail = f"Enhanced GSC (impressions): {matched_queries_str} | Total: {impression_totals[i]} impr, Best pos: {best_positions[i]:.1f}"
             
-            if not lead_keywords:
-                continue
-
-            # Match lead keywords with enhanced GSC data
-            keyword_match_score = 0
-            matched_queries = []
-            total_clicks = 0
-            total_impressions = 0
-            best_position = 100
-            has_actual_clicks = False
-
-            for _, gsc_row in self.gsc_keywords_df.iterrows():
-                gsc_query = str(gsc_row['query']).lower()
-                gsc_clicks = gsc_row['clicks']
-                gsc_impressions = gsc_row['impressions']
-                gsc_position = gsc_row['position']
-                
-                # Prioritize queries with actual clicks
-                if gsc_clicks > 0:
-                    has_actual_clicks = True
-
-                for lead_kw in lead_keywords:
-                    # Use fuzzy matching if available
-                    if FUZZY_AVAILABLE:
-                        similarity = fuzz.token_sort_ratio(lead_kw, gsc_query)
-                    else:
-                        similarity = 100 if lead_kw in gsc_query else 0
-                    
-                    if similarity > 60:  # Match threshold
-                        # Much higher weight for queries with actual clicks
-                        if gsc_clicks > 0:
-                            click_weight = min(100, gsc_clicks * 20)  # Even higher weight for enhanced data
-                            position_bonus = max(0, (20 - gsc_position) * 4)
-                            match_score = (similarity * 0.2) + (click_weight * 0.6) + (position_bonus * 0.2)
-                        else:
-                            # Lower weight for impression-only queries
-                            impression_weight = min(50, gsc_impressions / 100)
-                            position_bonus = max(0, (20 - gsc_position) * 2)
-                            match_score = (similarity * 0.4) + (impression_weight * 0.3) + (position_bonus * 0.3)
-                        
-                        keyword_match_score = max(keyword_match_score, match_score)
-                        matched_queries.append((lead_kw, gsc_query, similarity, gsc_clicks, gsc_position))
-                        total_clicks += gsc_clicks
-                        total_impressions += gsc_impressions
-                        best_position = min(best_position, gsc_position)
-
-            # Calculate enhanced GSC-based confidence score
-            if keyword_match_score > 0:
-                # Base score from keyword matching
-                base_confidence = keyword_match_score
-                
-                # Major boost for actual clicks (real traffic evidence)
-                if has_actual_clicks and total_clicks > 0:
-                    click_confidence_boost = min(50, total_clicks * 10)  # Up to 50 points for clicks
-                    data_quality_bonus = 20  # Bonus for having real click data
-                else:
-                    click_confidence_boost = min(20, total_impressions / 100)  # Lower boost for impressions only
-                    data_quality_bonus = 5
-                
-                # Position quality bonus
-                if best_position <= 3:
-                    position_bonus = 30
-                elif best_position <= 10:
-                    position_bonus = 20
-                elif best_position <= 20:
-                    position_bonus = 10
-                else:
-                    position_bonus = 0
+            hit_detail.append(detail)
 
-                # Final confidence calculation - much higher for enhanced data
-                confidence_score = base_confidence + click_confidence_boost + position_bonus + data_quality_bonus
-                confidence_score = min(100, confidence_score)
+            seo_count += 1
 
-                # Use medium threshold for enhanced GSC data
-                threshold = self.confidence_thresholds['medium']  # 50% threshold
-
-                if confidence_score >= threshold:
-                    self.leads_df.loc[idx, 'attributed_source'] = 'SEO'
-                    self.leads_df.loc[idx, 'attribution_confidence'] = confidence_score
-
-                    # Create detailed attribution description
-                    top_matches = sorted(matched_queries, key=lambda x: x[3], reverse=True)[:3]  # Sort by clicks
-                    matched_queries_str = '; '.join([f"{l}→{g}({c} clicks, pos {p:.1f})" for l, g, s, c, p in top_matches])
-                    
-                    if has_actual_clicks:
-                        detail = f"Enhanced GSC (with clicks): {matched_queries_str} | Total: {total_clicks} clicks, {total_impressions} impr, Best pos: {best_position:.1f}"
-                    else:
-                        detail = f"Enhanced GSC (impressions): {matched_queries_str} | Total: {total_impressions} impr, Best pos: {best_position:.1f}"
-                    
-                    self.leads_df.loc[idx, 'attribution_detail'] = detail
-
-                    seo_count += 1
-
-        unattributed_count = unattributed_mask.sum()
+        unattributed_count = len(unattributed_rows)
         if unattributed_count > 0:
             print_colored(f"✓ Identified {seo_count} leads as SEO traffic using enhanced GSC data ({seo_count/unattributed_count*100:.1f}% of unattributed)", Colors.GREEN)
         
-        return seo_count
+        return hit_idx, hit_conf, hit_detail
 
     def attribute_using_gsc_data(self) -> int:
         """Attribute using actual GSC click data"""
+        # Only consider leads not already attributed
+        hit_idx, hit_conf, hit_detail = self._match_gsc_data(self._unattributed_rows())
+        self._assign_attributions('SEO', hit_idx, hit_conf, hit_detail)
+        return len(hit_idx)
+
+    def _match_gsc_data(self, unattributed_rows: np.ndarray) -> Tuple[List, List, List[str]]:
+        """
+        Score unattributed leads against actual GSC click data.
+        
+        Returns the matched lead index, confidence and detail lists without touching leads_df.
+        """
         if self.gsc_data is None or self.gsc_data.empty:
             print_colored("No GSC data available for attribution", Colors.YELLOW)
-            return 0
+            return [], [], []
             
-        # Only consider leads not already attributed
-        unattributed_mask = self.leads_df['attributed_source'] == 'Unknown'
         seo_count = 0
-
-        print_colored(f"Analyzing {unattributed_mask.sum()} unattributed leads against {len(self.gsc_data)} GSC queries", Colors.BLUE)
-
-        # Loop through unattributed leads
-        for idx, lead in self.leads_df[unattributed_mask].iterrows():
-            lead_keywords = lead.get('extracted_keywords', [])
-            
-            if not lead_keywords:
-                continue
-
-            # Match lead keywords with GSC queries
-            keyword_match_score = 0
-            matched_queries = []
-            total_clicks = 0
-            total_impressions = 0
-            best_position = 100
-            best_ctr = 0
-
-            for _, gsc_row in self.gsc_data.iterrows():
-                gsc_query = str(gsc_row['query']).lower()
-                gsc_clicks = gsc_row['clicks']
-                gsc_impressions = gsc_row['impressions']
-                gsc_position = gsc_row['position']
-                gsc_ctr = gsc_row.get('ctr', 0)
-                
-                # Skip queries with no clicks (no real traffic evidence)
-                if gsc_clicks == 0:
-                    continue
-
-                for lead_kw in lead_keywords:
-                    # Use fuzzy matching if available
-                    if FUZZY_AVAILABLE:
-                        similarity = fuzz.token_sort_ratio(lead_kw, gsc_query)
-                    else:
-                        similarity = 100 if lead_kw in gsc_query else 0
-                    
-                    if similarity > 60:  # Match threshold
-                        # Weight heavily by actual clicks (real traffic evidence)
-                        click_weight = min(100, gsc_clicks * 15)  # Scale clicks to 0-100, higher weight than before
-                        position_bonus = max(0, (20 - gsc_position) * 3)  # Better positions get bonus
-                        ctr_bonus = min(20, gsc_ctr * 200)  # CTR bonus (ctr is decimal, so *200 for percentage)
-                        
-                        # Higher weight on clicks since this is real traffic
-                        match_score = (similarity * 0.3) + (click_weight * 0.5) + (position_bonus * 0.15) + (ctr_bonus * 0.05)
-                        
-                        keyword_match_score = max(keyword_match_score, match_score)
-                        matched_queries.append((lead_kw, gsc_query, similarity, gsc_clicks, gsc_position))
-                        total_clicks += gsc_clicks
-                        total_impressions += gsc_impressions
-                        best_position = min(best_position, gsc_position)
-                        best_ctr = max(best_ctr, gsc_ctr)
-
-            # Calculate GSC-based confidence score
-            if keyword_match_score > 0 and total_clicks > 0:
-                # Base score from keyword matching
-                base_confidence = keyword_match_score
-                
-                # Significant boost for actual clicks (real traffic evidence)
-                click_confidence_boost = min(40, total_clicks * 8)  # Up to 40 points for clicks
-                
-                # Position quality bonus
-                if best_position <= 3:
-                    position_bonus = 25
-                elif best_position <= 10:
-                    position_bonus = 15
-                elif best_position <= 20:
-                    position_bonus = 8
-                else:
-                    position_bonus = 0
-
-                # Time proximity bonus (if we have timestamp data)
-                time_bonus = 0
-                if 'first_inquiry_timestamp' in lead and pd.notna(lead['first_inquiry_timestamp']):
-                    lead_date = lead['first_inquiry_timestamp']
-                    # Check if GSC data overlaps with lead timing
-                    if 'date' in self.gsc_data.columns:
-                        # GSC data covers the period, give time bonus
-                        time_bonus = 10
-
-                # CTR bonus for high-performing queries
-                ctr_bonus = min(10, best_ctr * 100)  # Up to 10 points for high CTR
-
-                # Final confidence calculation - much higher than CSV-only
-                confidence_score = base_confidence + click_confidence_boost + position_bonus + time_bonus + ctr_bonus
-                confidence_score = min(100, confidence_score)  # Cap at 100
-
-                # Use medium threshold since we have real click data
-                threshold = self.confidence_thresholds['medium']  # 50% threshold
-
-                if confidence_score >= threshold:
-                    self.leads_df.loc[idx, 'attributed_source'] = 'SEO'
-                    self.leads_df.loc[idx, 'attribution_confidence'] = confidence_score
-
-                    # Create detailed attribution description
-                    top_matches = sorted(matched_queries, key=lambda x: x[3], reverse=True)[:3]  # Sort by clicks
-                    matched_queries_str = '; '.join([f"{l}→{g}({c} clicks, pos {p:.1f})" for l, g, s, c, p in top_matches])
-                    detail = f"GSC real clicks: {matched_queries_str} | Total: {total_clicks} clicks, {total_impressions} impr, Best pos: {best_position:.1f}, CTR: {best_ctr:.1%}"
-                    self.leads_df.loc[idx, 'attribution_detail'] = detail
-
-                    seo_count += 1
-
-        unattributed_count = unattributed_mask.sum()
+        hit_idx, hit_conf, hit_detail = [], [], []
+
+        print_colored(f"Analyzing {len(unattributed_rows)} unattributed leads against {len(self.gsc_data)} GSC queries", Colors.BLUE)
+
+        # Skip queries with no clicks (no real traffic evidence), then score all lead keywords in one batch
+        active_gsc = self._clicked_gsc_queries(self.gsc_data)
+        gsc_queries = lowercase_strings(active_gsc['query'])
+        gsc_clicks_list = active_gsc['clicks'].tolist()
+        gsc_positions_list = active_gsc['position'].tolist()
+        lead_keyword_rows, similarity_matrix = self._score_lead_keywords(unattributed_rows, gsc_queries)
+
+        # Per-query parts of the match score, computed once as arrays
+        gsc_clicks = active_gsc['clicks'].to_numpy()
+        gsc_impressions = active_gsc['impressions'].to_numpy()
+        gsc_positions = active_gsc['position'].to_numpy()
+        gsc_ctrs = active_gsc['ctr'].to_numpy() if 'ctr' in active_gsc.columns else np.zeros(len(active_gsc), dtype=int)
+        click_terms = np.fmin(100, gsc_clicks * 15) * 0.5  # Weight heavily by actual clicks (real traffic evidence)
+        position_terms = np.fmax(0, (20 - gsc_positions) * 3) * 0.15  # Better positions get bonus
+        ctr_terms = np.fmin(20, gsc_ctrs * 200) * 0.05  # CTR bonus (ctr is decimal, so *200 for percentage)
+
+        unattributed_leads = self.leads_df.iloc[unattributed_rows]
+
+        # Time proximity bonus (if we have timestamp data), for every unattributed lead at once:
+        # GSC data covers the period, so any lead with a timestamp gets it
+        lead_time_bonuses = np.zeros(len(unattributed_leads), dtype=int)
+        if 'first_inquiry_timestamp' in unattributed_leads.columns and 'date' in self.gsc_data.columns:
+            lead_time_bonuses = np.where(unattributed_leads['first_inquiry_timestamp'].notna().to_numpy(), 10, 0)
+
+        # Match lead keywords with GSC queries (match threshold 60) and aggregate per lead;
+        # higher weight on clicks since this is real traffic
+        matched, match_scores, (click_totals, impression_totals), best_positions, best_ctrs = aggregate_keyword_matches(
+            lead_keyword_rows, similarity_matrix, 0.3, [click_terms, position_terms, ctr_terms],
+            totals=(gsc_clicks, gsc_impressions), lowest=gsc_positions, highest=gsc_ctrs
+        )
+        candidates = np.flatnonzero(matched)
+
+        # Calculate GSC-based confidence scores for all matched leads at once
+        match_scores = match_scores[candidates]
+        click_totals = click_totals[candidates]
+        impression_totals = impression_totals[candidates]
+        best_positions = np.fmin(100, best_positions[candidates])
+        best_ctrs = np.fmax(0, best_ctrs[candidates])
+        click_confidence_boost = np.fmin(40, click_totals * 8)  # Up to 40 points for clicks (real traffic evidence)
+        position_bonus = position_bonus_ladder(best_positions, (25, 15, 8))
+        ctr_bonus = np.fmin(10, best_ctrs * 100)  # Up to 10 points for high CTR
+
+        # Final confidence calculation - much higher than CSV-only
+        time_bonuses = lead_time_bonuses[candidates]
+        confidence_scores = np.fmin(100, match_scores + click_confidence_boost + position_bonus + time_bonuses + ctr_bonus)  # Cap at 100
+
+        # Use medium threshold since we have real click data
+        threshold = self.confidence_thresholds['medium']  # 50% threshold
+        passed = (match_scores > 0) & (click_totals > 0) & (confidence_scores >= threshold)
+
+        lead_keyword_lists = unattributed_leads['extracted_keywords']
+        for i in np.nonzero(passed)[0]:
+            lead_pos = candidates[i]
+            idx, lead_keywords = lead_keyword_lists.index[lead_pos], lead_keyword_lists.iloc[lead_pos]
+            # Matched pairs in query order then lead keyword order
+            q_hits, k_hits = np.nonzero(similarity_matrix[lead_keyword_rows[lead_pos]].T > 60)
+            hit_idx.append(idx)
+            hit_conf.append(confidence_scores[i])
+
+            # Create detailed attribution description
+            matched_queries = [(lead_keywords[k], gsc_queries[q], gsc_clicks_list[q], gsc_positions_list[q])
+                               for q, k in zip(q_hits.tolist(), k_hits.tolist())]
+            top_matches = sorted(matched_queries, key=lambda x: x[2], reverse=True)[:3]  # Sort by clicks
+            matched_queries_str = '; '.join([f"{l}→{g}({c} clicks, pos {p:.1f})" for l, g, c, p in top_matches])
+            detail = f"GSC real clicks: {matched_queries_str} | Total: {click_totals[i]} clicks, {impression_totals[i]} impr, Best pos: {best_positions[i]:.1f}, CTR: {best_ctrs[i]:.1%}"
+            hit_detail.append(detail)
+
+            seo_count += 1
+
+        unattributed_count = len(unattributed_rows)
         if unattributed_count > 0:
             print_colored(f"✓ Identified {seo_count} leads as SEO traffic using GSC click data ({seo_count/unattributed_count*100:.1f}% of unattributed)", Colors.GREEN)
         
-        return seo_count
+        return hit_idx, hit_conf, hit_detail
 
     def attribute_using_seo_csv(self) -> int:
         """Identify SEO traffic using CSV keyword data (current implementation)"""
+        # Only consider leads not already attributed
+        hit_idx, hit_conf, hit_detail = self._match_seo_csv(self._unattributed_rows())
+        self._assign_attributions('SEO', hit_idx, hit_conf, hit_detail)
+        return len(hit_idx)
+
+    def get_seo_keyword_terms(self, keyword_column: str, position_column: str) -> Tuple[List[str], np.ndarray, np.ndarray, Dict[int, List[int]], np.ndarray, np.ndarray]:
+        """
+        Tokenized SEO keywords: the distinct terms, each keyword row's term ids (flattened
+        with row offsets), the rows each term appears in, and each row's position and
+        ranking bonus. Rows with a missing keyword are left out.
+        
+        Each keyword is lowercased and tokenized once; the result is kept until
+        seo_keywords_df is replaced.
+        """
+        cache_key = (keyword_column, position_column)
+        if (self._seo_keyword_terms is not None and self._seo_keyword_terms_source is self.seo_keywords_df
+                and self._seo_keyword_terms[0] == cache_key):
+            return self._seo_keyword_terms[1]
+
+        # Pull the SEO columns out once instead of building a Series per keyword row
+        seo_keywords = self.seo_keywords_df[keyword_column].tolist()
+        if position_column in self.seo_keywords_df.columns:
+            seo_positions = self.seo_keywords_df[position_column].tolist()
+        else:
+            seo_positions = [100] * len(seo_keywords)
+
+        seo_row_term_ids = []
+        row_positions = []
+        row_position_bonuses = []
+        term_columns = {}
+        term_seo_rows = defaultdict(list)
+        for seo_keyword, seo_position in zip(seo_keywords, seo_positions):
+            if pd.isna(seo_keyword):
+                continue
+                
+            seo_keyword_terms = self.extract_keywords_from_text(str(seo_keyword).lower())
+            term_ids = [term_columns.setdefault(term, len(term_columns)) for term in seo_keyword_terms]
+            for term_id in term_ids:
+                term_seo_rows[term_id].append(len(seo_row_term_ids))
+            seo_row_term_ids.append(term_ids)
+            position = seo_position if pd.notna(seo_position) else 100
+            row_positions.append(position)
+            # Higher score for better rankings
+            row_position_bonuses.append(max(0, 10 - position) * 3)
+
+        term_offsets = np.concatenate(([0], np.cumsum([len(term_ids) for term_ids in seo_row_term_ids], dtype=np.int64)))
+        flat_term_ids = np.array([term_id for term_ids in seo_row_term_ids for term_id in term_ids], dtype=np.int64)
+        seo_keyword_terms = (list(term_columns), term_offsets, flat_term_ids, term_seo_rows,
+                             np.array(row_positions, dtype=float), np.array(row_position_bonuses, dtype=float))
+
+        self._seo_keyword_terms = (cache_key, seo_keyword_terms)
+        self._seo_keyword_terms_source = self.seo_keywords_df
+        return seo_keyword_terms
+
+    def _match_seo_csv(self, unattributed_rows: np.ndarray) -> Tuple[List, List, List[str]]:
+        """
+        Score unattributed leads against CSV keyword data (current implementation).
+        
+        Returns the matched lead index, confidence and detail lists without touching leads_df.
+        """
         # Use the actual column name returned by traffic_loader
         keyword_column = 'keyword' if 'keyword' in self.seo_keywords_df.columns else 'keyphrase'
         position_column = 'position' if 'position' in self.seo_keywords_df.columns else 'current_position'
@@ -1872,125 +2524,213 @@ class LeadAttributionAnalyzer:
         if keyword_column not in self.seo_keywords_df.columns:
             print_colored(f"ERROR: Neither 'keyword' nor 'keyphrase' column found in SEO data", Colors.RED)
             print_colored(f"Available columns: {list(self.seo_keywords_df.columns)}", Colors.RED)
-            return 0
+            return [], [], []
             
-        # Only consider leads not already attributed
-        unattributed_mask = self.leads_df['attributed_source'] == 'Unknown'
         seo_count = 0
+        hit_idx, hit_conf, hit_detail = [], [], []
+
+        seo_terms, term_offsets, flat_term_ids, term_seo_rows, row_positions, row_position_bonuses = \
+            self.get_seo_keyword_terms(keyword_column, position_column)
+
+        # Score every lead keyword against the distinct SEO terms in one batch
+        lead_keyword_rows, similarity_matrix = self._score_lead_keywords(unattributed_rows, seo_terms, fallback='exact')
+
+        # Leads with a keyword match, scored together after the loop
+        candidate_idx, candidate_match_scores, candidate_avg_positions, candidate_matches = [], [], [], []
 
         # Loop through unattributed leads
-        for idx, lead in self.leads_df[unattributed_mask].iterrows():
-            lead_keywords = lead.get('extracted_keywords', [])
-            
+        lead_keyword_lists = self.leads_df['extracted_keywords'].iloc[unattributed_rows]
+        for idx, lead_keywords, keyword_rows in zip(lead_keyword_lists.index, lead_keyword_lists, lead_keyword_rows):
             if not lead_keywords:
                 continue
 
             # Match lead keywords with SEO keywords
-            keyword_match_score = 0
-            matched_keywords = []
-            matched_positions = []
-
-            for _, seo_kw in self.seo_keywords_df.iterrows():
-                try:
-                    # Use the actual column name
-                    if keyword_column not in seo_kw or pd.isna(seo_kw[keyword_column]):
-                        continue
-                        
-                    seo_keyword = str(seo_kw[keyword_column]).lower()
-                    seo_keyword_terms = self.extract_keywords_from_text(seo_keyword)
-
-                    for lead_kw in lead_keywords:
-                        for seo_kw_term in seo_keyword_terms:
-                            if FUZZY_AVAILABLE:
-                                similarity = fuzz.token_sort_ratio(lead_kw, seo_kw_term)
-                            else:
-                                similarity = 100 if lead_kw == seo_kw_term else 0
-                            
-                            if similarity > 60:
-                                # Higher score for better rankings (check column exists)
-                                position = seo_kw[position_column] if position_column in seo_kw and pd.notna(seo_kw[position_column]) else 100
-                                position_bonus = max(0, 10 - position) * 3
-                                adjusted_score = similarity + position_bonus
-                                matched_positions.append(position)
-                                
-                                keyword_match_score = max(keyword_match_score, adjusted_score)
-                                matched_keywords.append((lead_kw, seo_kw_term, similarity))
-                                
-                except KeyError as e:
-                    print_colored(f"Warning: Column error in SEO data: {e}", Colors.YELLOW)
-                    continue
+            lead_scores = similarity_matrix[keyword_rows]
+            
+            # Only SEO keywords containing a term some lead keyword matches can score; skip the rest
+            matched_term_ids = np.nonzero((lead_scores > 60).any(axis=0))[0]
+            if len(matched_term_ids) == 0:
+                continue
+            candidate_rows = np.array(sorted({row for term_id in matched_term_ids.tolist() for row in term_seo_rows[term_id]}), dtype=np.int64)
 
-            # Calculate overall SEO confidence score
-            if keyword_match_score > 0:
-                position_score = 0
-                if matched_positions:
-                    avg_position = sum(matched_positions) / len(matched_positions)
-                    if avg_position <= 1:
-                        position_score = 100
-                    elif avg_position <= 3:
-                        position_score = 90
-                    elif avg_position <= 5:
-                        position_score = 80
-                    elif avg_position <= 10:
-                        position_score = 70
-                    else:
-                        position_score = 60
+            # Every matching (SEO row, lead keyword, SEO term) triple at once, in row order
+            kw_positions, term_hits, similarities, hit_rows = window_keyword_hits(
+                lead_scores, candidate_rows, term_offsets, flat_term_ids
+            )
+            hit_rows = candidate_rows[hit_rows]
+            matched_positions = row_positions[hit_rows].tolist()
+            keyword_match_score = float((similarities + row_position_bonuses[hit_rows]).max()) if len(similarities) > 0 else 0
+            if keyword_match_score <= 0:
+                continue
 
-                confidence_score = (0.7 * keyword_match_score) + (0.3 * position_score)
-                confidence_score = min(100, confidence_score)
+            candidate_idx.append(idx)
+            candidate_match_scores.append(keyword_match_score)
+            candidate_avg_positions.append(sum(matched_positions) / len(matched_positions) if matched_positions else np.nan)
+            candidate_matches.append([(lead_keywords[k], seo_terms[t]) for k, t in zip(kw_positions[:3].tolist(), term_hits[:3].tolist())])
+
+        # Calculate overall SEO confidence scores for all matched leads at once:
+        # 70% keyword match, 30% average ranking (0 without ranked matches)
+        avg_positions = np.array(candidate_avg_positions, dtype=np.float64)
+        position_scores = np.select(
+            [avg_positions <= 1, avg_positions <= 3, avg_positions <= 5, avg_positions <= 10, np.isnan(avg_positions)],
+            [100, 90, 80, 70, 0],
+            60
+        )
+        confidence_scores = np.minimum(100, 0.7 * np.array(candidate_match_scores, dtype=np.float64) + 0.3 * position_scores)
 
-                if confidence_score >= self.confidence_thresholds['low']:
-                    self.leads_df.loc[idx, 'attributed_source'] = 'SEO'
-                    self.leads_df.loc[idx, 'attribution_confidence'] = confidence_score
+        for pos in np.flatnonzero(confidence_scores >= self.confidence_thresholds['low']).tolist():
+            hit_idx.append(candidate_idx[pos])
+            hit_conf.append(float(confidence_scores[pos]))
 
-                    matched_kw_str = '; '.join([f"{l}-{s}" for l, s, p in matched_keywords[:3]])
-                    avg_pos = sum(matched_positions) / len(matched_positions) if matched_positions else 0
-                    detail = f"Keyword matches: {matched_kw_str}, Avg position: {avg_pos:.1f}"
-                    self.leads_df.loc[idx, 'attribution_detail'] = detail
+            matched_kw_str = '; '.join([f"{l}-{s}" for l, s in candidate_matches[pos]])
+            avg_pos = 0 if np.isnan(avg_positions[pos]) else candidate_avg_positions[pos]
+            detail = f"Keyword matches: {matched_kw_str}, Avg position: {avg_pos:.1f}"
+            hit_detail.append(detail)
 
-                    seo_count += 1
+            seo_count += 1
 
-        unattributed_count = unattributed_mask.sum()
+        unattributed_count = len(unattributed_rows)
         if unattributed_count > 0:
             print_colored(f"✓ Identified {seo_count} leads as SEO traffic ({seo_count/unattributed_count*100:.1f}% of unattributed)", Colors.GREEN)
         
-        return seo_count
+        return hit_idx, hit_conf, hit_detail
+
+    def _assign_attributions(self, source: str, hit_idx: List, hit_conf: List, hit_detail: List[str], data_source: Optional[str] = None):
+        """Write a batch of attribution results collected in a loop, one assignment per column"""
+        if not hit_idx:
+            return
+        
+        self.leads_df.loc[hit_idx, 'attributed_source'] = source
+        self.leads_df.loc[hit_idx, 'attribution_confidence'] = hit_conf
+        if data_source is not None:
+            self.leads_df.loc[hit_idx, 'data_source'] = data_source
+        self.leads_df.loc[hit_idx, 'attribution_detail'] = hit_detail
 
     def _update_data_source_for_seo(self, source_type: str):
         """Update data_source field for SEO attributed leads"""
         seo_mask = self.leads_df['attributed_source'] == 'SEO'
-        self.leads_df.loc[seo_mask, 'data_source'] = source_type
         
-        # Update attribution detail to include data source
-        current_details = self.leads_df.loc[seo_mask, 'attribution_detail']
-        self.leads_df.loc[seo_mask, 'attribution_detail'] = current_details + f" (source: {source_type})"
+        # Tag the data source and append it to the attribution detail in one assignment
+        seo_details = self.leads_df.loc[seo_mask, 'attribution_detail'] + f" (source: {source_type})"
+        self.leads_df.loc[seo_mask, ['data_source', 'attribution_detail']] = pd.DataFrame(
+            {'data_source': source_type, 'attribution_detail': seo_details},
+            index=seo_details.index
+        )
+
+    def _active_ppc_keywords(self) -> List[str]:
+        """Distinct PPC keywords with clicks, from the per-keyword click totals"""
+        ppc_by_keyword = self.get_ppc_by_keyword()
+        return ppc_by_keyword.index[ppc_by_keyword['clicks'].to_numpy() > 0].tolist()
+
+    def _active_ppc_keyword_rows(self) -> np.ndarray:
+        """
+        Position in _active_ppc_keywords() of every combined_ppc_df row with clicks, in row order.
+        
+        Kept until combined_ppc_df is replaced, so keyword-only matches can be listed
+        PPC row by PPC row while each distinct keyword is only scored once.
+        """
+        if self._ppc_active_rows is not None and self._ppc_active_rows_source is self.combined_ppc_df:
+            return self._ppc_active_rows
+        
+        active_keywords = pd.Index(self._active_ppc_keywords())
+        if len(active_keywords) == 0:
+            self._ppc_active_rows = np.array([], dtype=np.intp)
+        else:
+            clicked_rows = self.combined_ppc_df[self.combined_ppc_df['clicks'] > 0]
+            positions = active_keywords.get_indexer(clicked_rows['keyword'].astype(str).str.lower())
+            self._ppc_active_rows = positions[positions >= 0]
+        
+        self._ppc_active_rows_source = self.combined_ppc_df
+        return self._ppc_active_rows
 
-    def match_ppc_keywords_only(self, lead_keywords, ppc_keywords=None):
-        """Match PPC keywords without time data - lower confidence"""
+    def match_ppc_keywords_only(self, lead_keywords, ppc_keywords=None, lead_scores=None):
+        """
+        Match PPC keywords without time data - lower confidence
+        
+        lead_scores can carry the lead keywords' rows of a similarity matrix against
+        _active_ppc_keywords(), when the caller has already scored a batch of leads.
+        """
         best_match_score = 0
         matched_keywords = []
         
-        for _, ppc_row in self.combined_ppc_df.iterrows():
-            if ppc_row['clicks'] == 0:
-                continue  # Skip keywords with no clicks
-                
-            ppc_keyword = str(ppc_row['keyword']).lower()
-            
-            for lead_kw in lead_keywords:
-                if FUZZY_AVAILABLE:
-                    similarity = fuzz.token_sort_ratio(lead_kw, ppc_keyword)
-                else:
-                    similarity = 100 if lead_kw == ppc_keyword else 0
-                
-                if similarity > 70:  # Higher threshold since no time validation
-                    best_match_score = max(best_match_score, similarity)
-                    matched_keywords.append((lead_kw, ppc_keyword, similarity))
+        # Each distinct PPC keyword is scored once, using the per-keyword click totals
+        active_keywords = self._active_ppc_keywords()
+        if lead_scores is None:
+            # Only scores above 70 count here, so the scorer can give up on anything lower
+            lead_scores = keyword_similarity_matrix(list(lead_keywords), active_keywords, 'exact', score_cutoff=70)
+        
+        # Higher threshold since no time validation; list the hits PPC row by PPC row
+        # (a keyword on several clicked rows is listed for each), then in lead keyword order
+        hit_mask = lead_scores > 70
+        ppc_rows = self._active_ppc_keyword_rows()
+        for ppc_pos in ppc_rows[hit_mask.any(axis=0)[ppc_rows]].tolist():
+            for kw_pos in np.flatnonzero(hit_mask[:, ppc_pos]).tolist():
+                similarity = int(lead_scores[kw_pos, ppc_pos])
+                best_match_score = max(best_match_score, similarity)
+                matched_keywords.append((lead_keywords[kw_pos], active_keywords[ppc_pos], similarity))
         
         # Cap confidence at 60% since we can't verify timing
         confidence = min(60, best_match_score * 0.6)
         
         return confidence, matched_keywords
 
+    def _ppc_time_proximity(self, lead_times: pd.Series, ppc_dates: pd.Series) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Place every lead against the PPC activity dates in one pass.
+
+        A lead's window runs from the day of (lead - attribution_window_hours) to the day
+        of (lead + 2h). Two merge_asof joins on the sorted PPC dates find the closest date
+        at or before the lead (capped at the window end) and the closest date after it;
+        the nearer of those inside the window gives the time gap.
+
+        Returns the window bounds as UTC nanoseconds, the gap in hours (NaN when the window
+        has no PPC activity or the lead has no timestamp) and the time proximity score, all
+        aligned with lead_times.
+        """
+        # Naive timestamps are treated as UTC; windows are cut at midnight in the lead's own timezone
+        if lead_times.dt.tz is None:
+            lead_times = lead_times.dt.tz_localize('UTC')
+        window_start = (lead_times - pd.Timedelta(hours=self.attribution_window_hours)).dt.normalize()
+        window_end = (lead_times + pd.Timedelta(hours=2)).dt.normalize()
+
+        utc_ns = 'datetime64[ns, UTC]'
+        leads = pd.DataFrame({
+            'lead_time': lead_times.dt.tz_convert('UTC').astype(utc_ns),
+            'window_start': window_start.dt.tz_convert('UTC').astype(utc_ns),
+            'window_end': window_end.dt.tz_convert('UTC').astype(utc_ns),
+        }).reset_index(drop=True)
+        leads['before_key'] = leads['lead_time'].where(leads['lead_time'] <= leads['window_end'], leads['window_end'])
+        activity = pd.DataFrame({'ppc_date': ppc_dates.dropna().astype(utc_ns).sort_values().to_numpy()})
+
+        # merge_asof rejects null keys, so leads without a timestamp are left out (no activity found)
+        dated = leads[leads['lead_time'].notna()]
+        before = pd.merge_asof(dated[['before_key']].reset_index().sort_values('before_key'), activity,
+                               left_on='before_key', right_on='ppc_date', direction='backward')
+        after = pd.merge_asof(dated[['lead_time']].reset_index().sort_values('lead_time'), activity,
+                              left_on='lead_time', right_on='ppc_date', direction='forward')
+        before = before.set_index('index')['ppc_date'].reindex(leads.index)
+        after = after.set_index('index')['ppc_date'].reindex(leads.index)
+
+        lead_ns = leads['lead_time'].to_numpy(dtype='datetime64[ns]').astype('int64')
+        start_ns = leads['window_start'].to_numpy(dtype='datetime64[ns]').astype('int64')
+        end_ns = leads['window_end'].to_numpy(dtype='datetime64[ns]').astype('int64')
+        gap_hours = np.full(len(leads), np.inf)
+        for nearest, in_window in ((before, (before >= leads['window_start']).to_numpy()),
+                                   (after, (after <= leads['window_end']).to_numpy())):
+            # Same rounding as Timedelta.total_seconds(): whole microseconds
+            gap_us = (lead_ns - nearest.to_numpy(dtype='datetime64[ns]').astype('int64')) // 1000
+            gap_hours = np.where(in_window, np.fmin(gap_hours, np.abs(gap_us / 1e6 / 3600)), gap_hours)
+        gap_hours[np.isinf(gap_hours)] = np.nan
+
+        # Score based on hours: bucket lookup up to 48h, linear decay after that
+        buckets = np.searchsorted(PPC_TIME_GAP_BINS, gap_hours, side='left')
+        proximity_scores = np.where(
+            buckets < len(PPC_TIME_GAP_BINS),
+            PPC_TIME_GAP_SCORES[np.minimum(buckets, len(PPC_TIME_GAP_BINS) - 1)],
+            np.fmax(0, 50 - (gap_hours - 48) / 24 * 10)
+        )
+        return start_ns, end_ns, gap_hours, proximity_scores
+
     def identify_ppc_traffic(self):
         """Identify traffic from PPC campaigns"""
         print_colored("Identifying PPC traffic...", Colors.BLUE)
@@ -2007,8 +2747,11 @@ class LeadAttributionAnalyzer:
         # Check if we have date data for time-based attribution
         has_valid_dates = False
         if 'date' in self.combined_ppc_df.columns:
-            valid_dates = pd.to_datetime(self.combined_ppc_df['date'], errors='coerce').notna()
-            has_valid_dates = valid_dates.any()
+            # process_ppc_data already stores UTC dates; only frames built elsewhere need converting
+            ppc_dates = self.combined_ppc_df['date']
+            if not isinstance(ppc_dates.dtype, pd.DatetimeTZDtype):
+                ppc_dates = pd.to_datetime(ppc_dates, errors='coerce', utc=True)
+            has_valid_dates = ppc_dates.notna().any()
 
         if not has_valid_dates:
             print_colored("Note: PPC attribution using keyword matching only (no date data available)", Colors.YELLOW)
@@ -2016,6 +2759,9 @@ class LeadAttributionAnalyzer:
         else:
             print_colored("PPC attribution using keyword matching with time verification", Colors.BLUE)
 
+        # Flag keyword-only attributions so reports don't have to re-scan the detail text
+        self.leads_df['ppc_keyword_only'] = False
+
         # Only consider leads not already attributed
         unattributed_mask = self.leads_df['attributed_source'] == 'Unknown'
         
@@ -2024,147 +2770,128 @@ class LeadAttributionAnalyzer:
             unattributed_mask = unattributed_mask & self.leads_df['first_inquiry_timestamp'].notna()
 
         ppc_count = 0
+        hit_idx, hit_conf, hit_detail = [], [], []
+        keyword_only_idx = []
+        unattributed_rows = np.flatnonzero(unattributed_mask.to_numpy())
+        unattributed_count = len(unattributed_rows)
 
-        if unattributed_mask.sum() == 0:
+        if unattributed_count == 0:
             if has_valid_dates:
                 print_colored("No unattributed leads with valid timestamps for PPC analysis", Colors.YELLOW)
             else:
                 print_colored("No unattributed leads for PPC analysis", Colors.YELLOW)
             return
 
+        # Pull the lead columns out once instead of building a Series per lead
+        unattributed_leads = self.leads_df.iloc[unattributed_rows]
+        lead_keyword_lists = unattributed_leads['extracted_keywords'].tolist()
+        if 'first_inquiry_timestamp' in unattributed_leads.columns:
+            lead_timestamps = unattributed_leads['first_inquiry_timestamp'].tolist()
+        else:
+            lead_timestamps = [None] * len(unattributed_leads)
+
+        # Find each lead's nearest PPC activity up front with sorted as-of joins
+        if has_valid_dates:
+            window_start_ns, window_end_ns, gap_hours, proximity_scores = self._ppc_time_proximity(
+                unattributed_leads['first_inquiry_timestamp'], ppc_dates
+            )
+
+            # Dated PPC rows with clicks, sorted by date, so each lead's window is a slice
+            ppc_date_ns = ppc_dates.to_numpy(dtype='datetime64[ns]').astype('int64')
+            ppc_order = np.flatnonzero(ppc_dates.notna().to_numpy() & (self.combined_ppc_df['clicks'] > 0).to_numpy())
+            ppc_order = ppc_order[np.argsort(ppc_date_ns[ppc_order], kind='stable')]
+            sorted_date_ns = ppc_date_ns[ppc_order]
+            window_lo = np.searchsorted(sorted_date_ns, window_start_ns, side='left')
+            window_hi = np.searchsorted(sorted_date_ns, window_end_ns, side='right')
+            lead_proximity = zip(window_lo.tolist(), window_hi.tolist(), gap_hours.tolist(), proximity_scores.tolist())
+
+            # Score every lead keyword against the distinct PPC keyword terms in one batch
+            ppc_row_terms, ppc_terms = self.get_ppc_keyword_terms()
+            lead_keyword_rows, similarity_matrix = self._score_lead_keywords(unattributed_rows, ppc_terms, fallback='exact')
+            # Each PPC row's term ids, flattened with row offsets
+            term_offsets = np.concatenate(([0], np.cumsum([len(term_ids) for _, term_ids in ppc_row_terms], dtype=np.int64)))
+            flat_term_ids = np.array([term_id for _, term_ids in ppc_row_terms for term_id in term_ids], dtype=np.int64)
+        else:
+            lead_proximity = [(None, None, None, None)] * len(unattributed_leads)
+
+            # Keyword-only matching: score every lead keyword against the active PPC keywords
+            # in one batch (cdist spreads this over all cores)
+            lead_keyword_rows, keyword_only_matrix = self._score_lead_keywords(
+                unattributed_rows, self._active_ppc_keywords(), fallback='exact'
+            )
+
+        # Time-based keyword matches, scored together after the loop
+        timed_idx, timed_keyword_scores, timed_proximity, timed_details = [], [], [], []
+
         # Loop through unattributed leads
-        for idx, lead in self.leads_df[unattributed_mask].iterrows():
-            lead_keywords = lead.get('extracted_keywords', [])
-            
+        for idx, lead_keywords, lead_time, keyword_rows, (window_lo, window_hi, min_hours_diff, time_proximity_score) in zip(
+                unattributed_leads.index, lead_keyword_lists, lead_timestamps, lead_keyword_rows, lead_proximity):
             if not lead_keywords:
                 continue
 
             # Use different attribution methods based on data availability
-            if has_valid_dates and pd.notna(lead.get('first_inquiry_timestamp')):
+            if has_valid_dates and pd.notna(lead_time):
                 # Time-based attribution (existing logic)
-                ppc_data_to_check = self.combined_ppc_df.copy()
-                time_proximity_score = 50
-                time_diffs = []
-                
-                lead_time = lead['first_inquiry_timestamp']
-                
-                # Ensure lead_time is timezone-aware for comparison
-                if lead_time.tz is None:
-                    lead_time = lead_time.tz_localize('UTC')
-
-                # Define time window for attribution
-                time_window_start = lead_time - pd.Timedelta(hours=self.attribution_window_hours)
-                time_window_end = lead_time + pd.Timedelta(hours=2)
-                
-                # Filter PPC data within time window
-                ppc_dates = pd.to_datetime(ppc_data_to_check['date'], errors='coerce')
-                valid_date_mask = ppc_dates.notna()
-                
-                if valid_date_mask.any():
-                    time_window_mask = (
-                        (ppc_dates >= time_window_start.normalize()) & 
-                        (ppc_dates <= time_window_end.normalize()) &
-                        valid_date_mask
-                    )
-                    
-                    if time_window_mask.any():
-                        ppc_data_to_check = ppc_data_to_check[time_window_mask]
-                        
-                        # Calculate time proximity score
-                        filtered_dates = ppc_dates[time_window_mask]
-                        for ppc_date in filtered_dates:
-                            if pd.notna(ppc_date):
-                                if ppc_date.tz is None:
-                                    ppc_date = ppc_date.tz_localize('UTC')
-                                
-                                time_diff_hours = abs((lead_time - ppc_date).total_seconds() / 3600)
-                                time_diffs.append(time_diff_hours)
-                        
-                        if time_diffs:
-                            min_hours_diff = min(time_diffs)
-                            
-                            # Score based on hours
-                            if min_hours_diff <= 1:
-                                time_proximity_score = 100
-                            elif min_hours_diff <= 6:
-                                time_proximity_score = 95
-                            elif min_hours_diff <= 12:
-                                time_proximity_score = 85
-                            elif min_hours_diff <= 24:
-                                time_proximity_score = 75
-                            elif min_hours_diff <= 48:
-                                time_proximity_score = 60
-                            else:
-                                time_proximity_score = max(0, 50 - (min_hours_diff - 48) / 24 * 10)
-                    else:
-                        # No PPC activity in time window
-                        continue
+                if np.isnan(min_hours_diff):
+                    # No PPC activity in time window
+                    continue
 
-                # Filter for campaigns with clicks
-                ppc_data_to_check = ppc_data_to_check[ppc_data_to_check['clicks'] > 0]
+                # PPC rows within time window, for campaigns with clicks, back in their original order
+                ppc_rows_to_check = np.sort(ppc_order[window_lo:window_hi])
 
-                if ppc_data_to_check.empty:
+                if len(ppc_rows_to_check) == 0:
                     continue
 
                 # Match lead keywords with PPC keywords
-                keyword_match_score = 0
-                matched_keywords = []
-
-                for _, ppc_row in ppc_data_to_check.iterrows():
-                    ppc_keyword = str(ppc_row['keyword']).lower()
-                    ppc_keyword_terms = self.extract_keywords_from_text(ppc_keyword)
-
-                    for lead_kw in lead_keywords:
-                        for ppc_kw in ppc_keyword_terms:
-                            if FUZZY_AVAILABLE:
-                                similarity = fuzz.token_sort_ratio(lead_kw, ppc_kw)
-                            else:
-                                similarity = 100 if lead_kw == ppc_kw else 0
-                            
-                            if similarity > 60:
-                                # Boost score for exact matches
-                                if similarity == 100:
-                                    keyword_match_score = max(keyword_match_score, similarity + 10)
-                                else:
-                                    keyword_match_score = max(keyword_match_score, similarity)
-                                matched_keywords.append((lead_kw, ppc_kw, similarity))
-
-                # Calculate confidence score with time data
-                if keyword_match_score > 0:
-                    confidence_score = (0.6 * keyword_match_score) + (0.4 * time_proximity_score)
-                    threshold = self.confidence_thresholds['low']
-
-                    if confidence_score >= threshold:
-                        self.leads_df.loc[idx, 'attributed_source'] = 'PPC'
-                        self.leads_df.loc[idx, 'attribution_confidence'] = confidence_score
-                        self.leads_df.loc[idx, 'data_source'] = 'ppc_csv'
-
-                        matched_kw_str = '; '.join([f"{l}-{p}" for l, p, s in matched_keywords[:3]])
-                        min_hours = min(time_diffs)
-                        detail = f"Keyword matches: {matched_kw_str}, Time gap: {min_hours:.1f}h, Proximity score: {time_proximity_score:.1f}% (source: ppc_csv)"
-                        
-                        self.leads_df.loc[idx, 'attribution_detail'] = detail
-                        ppc_count += 1
+                kw_positions, term_hits, similarities, _ = window_keyword_hits(
+                    similarity_matrix[keyword_rows], ppc_rows_to_check, term_offsets, flat_term_ids
+                )
+                if len(similarities) == 0:
+                    continue
+
+                # Boost score for exact matches
+                keyword_match_score = int(np.where(similarities == 100, similarities + 10, similarities).max())
+                matched_keywords = [(lead_keywords[k], ppc_terms[t]) for k, t in zip(kw_positions[:3].tolist(), term_hits[:3].tolist())]
+
+                timed_idx.append(idx)
+                timed_keyword_scores.append(keyword_match_score)
+                timed_proximity.append(time_proximity_score)
+                matched_kw_str = '; '.join([f"{l}-{p}" for l, p in matched_keywords])
+                timed_details.append(f"Keyword matches: {matched_kw_str}, Time gap: {min_hours_diff:.1f}h, Proximity score: {time_proximity_score:.1f}% (source: ppc_csv)")
                         
             else:
                 # Keyword-only attribution (no time data)
-                confidence_score, matched_keywords = self.match_ppc_keywords_only(lead_keywords)
+                confidence_score, matched_keywords = self.match_ppc_keywords_only(
+                    lead_keywords, lead_scores=None if has_valid_dates else keyword_only_matrix[keyword_rows]
+                )
                 
                 # Use lower threshold for keyword-only matching
                 threshold = self.confidence_thresholds['low'] * 0.8
 
                 if confidence_score >= threshold:
-                    self.leads_df.loc[idx, 'attributed_source'] = 'PPC'
-                    self.leads_df.loc[idx, 'attribution_confidence'] = confidence_score
-                    self.leads_df.loc[idx, 'data_source'] = 'ppc_csv'
+                    hit_idx.append(idx)
+                    hit_conf.append(confidence_score)
 
                     matched_kw_str = '; '.join([f"{l}-{p}" for l, p, s in matched_keywords[:3]])
                     detail = f"Keyword match only (no date data): {matched_kw_str} (source: ppc_csv)"
                     
-                    self.leads_df.loc[idx, 'attribution_detail'] = detail
+                    hit_detail.append(detail)
+                    keyword_only_idx.append(idx)
                     ppc_count += 1
 
-        unattributed_count = unattributed_mask.sum()
+        # Calculate confidence scores with time data for all keyword-matched leads at once
+        if timed_idx:
+            confidence_scores = 0.6 * np.array(timed_keyword_scores, dtype=float) + 0.4 * np.array(timed_proximity, dtype=float)
+            for pos in np.flatnonzero(confidence_scores >= self.confidence_thresholds['low']).tolist():
+                hit_idx.append(timed_idx[pos])
+                hit_conf.append(float(confidence_scores[pos]))
+                hit_detail.append(timed_details[pos])
+                ppc_count += 1
+
+        self._assign_attributions('PPC', hit_idx, hit_conf, hit_detail, data_source='ppc_csv')
+        if keyword_only_idx:
+            self.leads_df.loc[keyword_only_idx, 'ppc_keyword_only'] = True
+
         if unattributed_count > 0:
             attribution_method = "time-aware" if has_valid_dates else "keyword-only"
             print_colored(f"✓ Identified {ppc_count} leads as PPC traffic using {attribution_method} matching ({ppc_count/unattributed_count*100:.1f}% of unattributed)", Colors.GREEN)
@@ -2179,140 +2906,157 @@ class LeadAttributionAnalyzer:
             (self.leads_df['first_inquiry_timestamp'].notna())
         )
 
-        if unattributed_mask.sum() == 0:
+        unattributed_rows = np.flatnonzero(unattributed_mask.to_numpy())
+        unattributed_count = len(unattributed_rows)
+
+        if unattributed_count == 0:
             print_colored("No unattributed leads with valid timestamps for referral analysis", Colors.YELLOW)
             return
 
-        # Extract email domains
-        self.leads_df['email_domain'] = self.leads_df['email'].apply(
-            lambda x: x.split('@')[1] if isinstance(x, str) and '@' in x else ''
-        )
+        # Extract email domains: the part after the first '@' (up to any second one),
+        # '' for non-strings and values without '@'. Splitting stops after the second '@',
+        # since nothing past it is used. Domains repeat across leads, so the column is
+        # dictionary encoded and counted over its integer codes.
+        self.leads_df['email_domain'] = self.leads_df['email'].str.split('@', n=2).str[1].fillna('').astype('category')
 
         # Count emails per domain
-        domain_counts = self.leads_df['email_domain'].value_counts()
-        multiple_lead_domains = domain_counts[domain_counts > 1].index.tolist()
+        domain_codes = self.leads_df['email_domain'].cat.codes.to_numpy()
+        domain_counts = np.bincount(domain_codes, minlength=len(self.leads_df['email_domain'].cat.categories))
 
         # Look for temporal clusters using real timestamps
-        valid_timestamp_leads = self.leads_df[self.leads_df['first_inquiry_timestamp'].notna()]
-        if not valid_timestamp_leads.empty:
+        # (only the timestamp column is needed, so no copy of the lead rows is made)
+        valid_inquiry_times = self.leads_df['first_inquiry_timestamp'].dropna()
+        if not valid_inquiry_times.empty:
             # Group by date for temporal analysis
-            valid_timestamp_leads = valid_timestamp_leads.copy()
-            valid_timestamp_leads['inquiry_date'] = valid_timestamp_leads['first_inquiry_timestamp'].dt.date
-            date_counts = valid_timestamp_leads['inquiry_date'].value_counts()
-            busy_dates = date_counts[date_counts > 2].index.tolist()
+            date_counts = valid_inquiry_times.dt.date.value_counts()
+            busy_dates = set(date_counts[date_counts > 2].index)
             
             # Also look for hourly clusters (more precise)
-            valid_timestamp_leads['inquiry_hour'] = valid_timestamp_leads['first_inquiry_timestamp'].dt.floor('h')
-            hour_counts = valid_timestamp_leads['inquiry_hour'].value_counts()
-            busy_hours = hour_counts[hour_counts > 1].index.tolist()
+            hour_counts = valid_inquiry_times.dt.floor('h').value_counts()
+            busy_hours = set(hour_counts[hour_counts > 1].index)
         else:
-            busy_dates = []
-            busy_hours = []
-
-        referral_count = 0
+            busy_dates = set()
+            busy_hours = set()
+
+        # Sorted ticket dates (UTC ns), so a lead's neighbours within ±2h/±1h are counted
+        # with two binary searches instead of a scan over every lead
+        ticket_dates = self.leads_df['first_ticket_date'].dropna()
+        if ticket_dates.dt.tz is not None:
+            ticket_dates = ticket_dates.dt.tz_convert('UTC')
+        ticket_date_ns = np.sort(ticket_dates.to_numpy(dtype='datetime64[ns]').astype('int64'))
+
+        ns_per_hour = pd.Timedelta(hours=1).value
+
+        # Ensure timezone consistency once for the whole column rather than per lead
+        inquiry_times = self.leads_df['first_inquiry_timestamp'].iloc[unattributed_rows]
+        if inquiry_times.dt.tz is None:
+            inquiry_times = inquiry_times.dt.tz_localize('UTC')
+        # Calendar day, hour bucket and display string of each lead, computed for the column at once
+        inquiry_dates = inquiry_times.dt.date
+        inquiry_hours = inquiry_times.dt.floor('h')
+        inquiry_time_strings = inquiry_times.dt.strftime('%Y-%m-%d %H:%M').tolist()
+
+        unattributed_leads = self.leads_df.iloc[unattributed_rows]
+
+        # Domain pattern: leads sharing their email domain with other leads
+        lead_domains = unattributed_leads['email_domain'].tolist()
+        lead_domain_counts = domain_counts[domain_codes[unattributed_rows]]
+        domain_lead_counts = np.where(lead_domain_counts > 1, lead_domain_counts, 0)
+        domain_scores = np.where(domain_lead_counts > 0, np.minimum(60, domain_lead_counts * 15), 0)
+
+        # Daily clusters: other leads on the same (busy) day
+        in_busy_date = np.array([inquiry_date in busy_dates for inquiry_date in inquiry_dates], dtype=bool)
+        daily_cluster_counts = np.zeros(unattributed_count, dtype=np.int64)
+        if in_busy_date.any():
+            daily_cluster_counts[in_busy_date] = inquiry_dates[in_busy_date].map(date_counts).to_numpy(dtype=np.int64) - 1  # Exclude current lead
+        daily_scores = np.where(daily_cluster_counts > 0, np.minimum(30, daily_cluster_counts * 8), 0)
+
+        # Hourly clusters (more precise referral detection): leads whose first_ticket_date is
+        # within ±2h/±1h of the inquiry, excluding the lead's own ticket date, counted for
+        # every lead with binary searches over the sorted ticket dates
+        in_busy_hour = np.array([inquiry_hour in busy_hours for inquiry_hour in inquiry_hours], dtype=bool)
+        centers = inquiry_times.to_numpy(dtype='datetime64[ns]').astype('int64')
+        own_ticket_dates = unattributed_leads['first_ticket_date']
+        has_own_date = own_ticket_dates.notna().to_numpy()
+        own_date_ns = own_ticket_dates.to_numpy(dtype='datetime64[ns]').astype('int64')
+
+        def leads_within(hours: int) -> np.ndarray:
+            lo = centers - hours * ns_per_hour
+            hi = centers + hours * ns_per_hour
+            counts = np.searchsorted(ticket_date_ns, hi, side='right') - np.searchsorted(ticket_date_ns, lo, side='left')
+            return counts - (has_own_date & (lo <= own_date_ns) & (own_date_ns <= hi))
+
+        time_cluster_counts = np.where(in_busy_hour, leads_within(2), 0)
+        hourly_cluster_counts = np.where(time_cluster_counts > 0, leads_within(1), 0)
+        # Higher score for tighter time clusters
+        time_scores = np.select(
+            [hourly_cluster_counts > 0, time_cluster_counts > 0],
+            [np.minimum(50, hourly_cluster_counts * 20), np.minimum(35, time_cluster_counts * 12)],
+            0
+        )
 
-        # Identify potential referrals
-        for idx, lead in self.leads_df[unattributed_mask].iterrows():
-            referral_score = 0
+        # Additional referral indicators using ticket span data: short-lived inquiries
+        if 'ticket_span_days' in unattributed_leads.columns:
+            ticket_spans = pd.to_numeric(unattributed_leads['ticket_span_days'], errors='coerce').to_numpy(dtype=float)
+        else:
+            ticket_spans = np.full(unattributed_count, np.nan)
+        span_scores = np.select([ticket_spans == 0, ticket_spans <= 1], [10, 5], 0)
+
+        # Calculate overall referral confidence scores
+        confidence_scores = np.minimum(100, domain_scores + daily_scores + time_scores + span_scores)
+        hit_positions = np.flatnonzero(confidence_scores >= self.confidence_thresholds['low'])
+
+        # Evidence is only spelled out for the leads that qualify
+        hit_idx = unattributed_leads.index[hit_positions].tolist()
+        hit_conf = confidence_scores[hit_positions].tolist()
+        hit_detail = []
+        for pos in hit_positions.tolist():
             referral_evidence = []
+            if domain_lead_counts[pos] > 0:
+                referral_evidence.append(f"Domain pattern: {domain_lead_counts[pos]} leads from {lead_domains[pos]}")
+            if daily_cluster_counts[pos] > 0:
+                referral_evidence.append(f"Daily cluster: {daily_cluster_counts[pos]} other leads on {inquiry_dates.iloc[pos]}")
+            if hourly_cluster_counts[pos] > 0:
+                referral_evidence.append(f"Tight time cluster: {hourly_cluster_counts[pos]} leads within 1 hour")
+            elif time_cluster_counts[pos] > 0:
+                referral_evidence.append(f"Time cluster: {time_cluster_counts[pos]} leads within 2 hours")
+            if ticket_spans[pos] == 0:
+                referral_evidence.append("Single-day inquiry (referral indicator)")
+            elif ticket_spans[pos] <= 1:
+                referral_evidence.append("Short inquiry span (referral indicator)")
+
+            # Add timestamp info to referral details
+            timestamp_info = f"Inquiry at {inquiry_time_strings[pos]}"
+            all_evidence = referral_evidence + [timestamp_info, "source: pattern"]
+            hit_detail.append('; '.join(all_evidence))
+        referral_count = len(hit_idx)
+
+        self._assign_attributions('Referral', hit_idx, hit_conf, hit_detail, data_source='pattern')
 
-            # Check domain pattern
-            if lead['email_domain'] in multiple_lead_domains:
-                domain_count = domain_counts[lead['email_domain']]
-                domain_score = min(60, domain_count * 15)
-                referral_score += domain_score
-                referral_evidence.append(f"Domain pattern: {domain_count} leads from {lead['email_domain']}")
+        if unattributed_count > 0:
+            print_colored(f"✓ Identified {referral_count} leads as Referral traffic ({referral_count/unattributed_count*100:.1f}% of unattributed)", Colors.GREEN)
 
-            # Check temporal clusters using real timestamps
-            inquiry_time = lead['first_inquiry_timestamp']
-            
-            # Ensure timezone consistency
-            if inquiry_time.tz is None:
-                inquiry_time = inquiry_time.tz_localize('UTC')
+    @staticmethod
+    def _ga4_window_sessions(traffic: pd.DataFrame, lead_times: pd.Series,
+                             before: pd.Timedelta, after: pd.Timedelta) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Total GA4 sessions between (lead - before) and (lead + after), inclusive, for every lead.
 
-            # Check daily clusters
-            try:
-                inquiry_date = inquiry_time.date()
-                if inquiry_date in busy_dates:
-                    daily_cluster_count = date_counts.get(inquiry_date, 0) - 1  # Exclude current lead
-                    if daily_cluster_count > 0:
-                        daily_score = min(30, daily_cluster_count * 8)
-                        referral_score += daily_score
-                        referral_evidence.append(f"Daily cluster: {daily_cluster_count} other leads on {inquiry_date}")
-            except AttributeError:
-                pass  # Skip if timestamp processing fails
-
-            # Check hourly clusters (more precise referral detection)
-            try:
-                inquiry_hour = inquiry_time.floor('h')
-                if inquiry_hour in busy_hours:
-                # Define tighter time window for referral detection
-                    time_window_start = inquiry_time - pd.Timedelta(hours=2)
-                    time_window_end = inquiry_time + pd.Timedelta(hours=2)
-
-                    # Find leads in the same time window
-                    time_window_mask = (
-                        (self.leads_df['first_ticket_date'] >= time_window_start) &
-                        (self.leads_df['first_ticket_date'] <= time_window_end) &
-                        (self.leads_df.index != idx) &
-                        (self.leads_df['first_ticket_date'].notna())
-                    )
-                    
-                    time_window_inquiries = self.leads_df[time_window_mask]
-                    time_cluster_count = len(time_window_inquiries)
-                    
-                    if time_cluster_count > 0:
-                        # Higher score for tighter time clusters
-                        hourly_time_window_start = inquiry_time - pd.Timedelta(hours=1)
-                        hourly_time_window_end = inquiry_time + pd.Timedelta(hours=1)
-                        
-                        hourly_cluster_mask = (
-                            (time_window_inquiries['first_ticket_date'] >= hourly_time_window_start) &
-                            (time_window_inquiries['first_ticket_date'] <= hourly_time_window_end)
-                        )
-                        
-                        hourly_cluster_count = hourly_cluster_mask.sum()
-                        
-                        if hourly_cluster_count > 0:
-                            time_score = min(50, hourly_cluster_count * 20)  # Higher score for tight clusters
-                            referral_evidence.append(f"Tight time cluster: {hourly_cluster_count} leads within 1 hour")
-                        else:
-                            time_score = min(35, time_cluster_count * 12)
-                            referral_evidence.append(f"Time cluster: {time_cluster_count} leads within 2 hours")
-                        
-                        referral_score += time_score
-            except AttributeError:
-                pass  # Skip if timestamp processing fails
-
-            # Additional referral indicators using ticket span data
-            if 'ticket_span_days' in self.leads_df.columns and pd.notna(lead.get('ticket_span_days')):
-                ticket_span = lead['ticket_span_days']
-                # Short-lived inquiries might indicate referral traffic
-                if ticket_span == 0:
-                    referral_score += 10
-                    referral_evidence.append("Single-day inquiry (referral indicator)")
-                elif ticket_span <= 1:
-                    referral_score += 5
-                    referral_evidence.append("Short inquiry span (referral indicator)")
-
-            # Calculate overall referral confidence score
-            confidence_score = min(100, referral_score)
-
-            if confidence_score >= self.confidence_thresholds['low']:
-                self.leads_df.loc[idx, 'attributed_source'] = 'Referral'
-                self.leads_df.loc[idx, 'attribution_confidence'] = confidence_score
-                self.leads_df.loc[idx, 'data_source'] = 'pattern'
-                
-                # Add timestamp info to referral details
-                timestamp_info = f"Inquiry at {inquiry_time.strftime('%Y-%m-%d %H:%M')}"
-                all_evidence = referral_evidence + [timestamp_info, "source: pattern"]
-                self.leads_df.loc[idx, 'attribution_detail'] = '; '.join(all_evidence)
+        The traffic rows are sorted by datetime once; each lead's window is then two binary
+        searches and its session total a difference of running sums.
 
-                referral_count += 1
+        Returns the traffic row positions in datetime order, each lead's [lo, hi) slice into
+        that order and the windowed session totals, aligned with lead_times.
+        """
+        traffic_times = traffic['datetime'].reset_index(drop=True)
+        traffic_times = traffic_times[traffic_times.notna()].sort_values(kind='stable')
+        rows = traffic_times.index.to_numpy()
+        traffic_times = traffic_times.reset_index(drop=True)
 
-        unattributed_count = unattributed_mask.sum()
-        if unattributed_count > 0:
-            print_colored(f"✓ Identified {referral_count} leads as Referral traffic ({referral_count/unattributed_count*100:.1f}% of unattributed)", Colors.GREEN)
+        lo = traffic_times.searchsorted(lead_times - before, side='left')
+        hi = traffic_times.searchsorted(lead_times + after, side='right')
+        running_sessions = np.concatenate(([0], np.cumsum(traffic['sessions'].fillna(0).to_numpy()[rows])))
+        return rows, lo, hi, running_sessions[hi] - running_sessions[lo]
 
     def validate_attribution_with_ga4(self):
         """Validate attributions using GA4 traffic patterns"""
@@ -2328,129 +3072,162 @@ class LeadAttributionAnalyzer:
         # Initialize GA4 validation columns
         self.leads_df['ga4_validated'] = False
         self.leads_df['ga4_sessions'] = 0
-        
-        for idx, lead in self.leads_df.iterrows():
-            if lead['attributed_source'] in ['SEO', 'PPC', 'Unknown']:
-                # Check for traffic near lead time
-                lead_time = pd.to_datetime(lead['first_ticket_date'])
-                if pd.isna(lead_time):
+        validated_idx, validated_conf, validated_sessions, validated_detail = [], [], [], []
+
+        # Check source alignment
+        source_map = {
+            'SEO': ['google', 'bing', 'yahoo'],  # organic sources
+            'PPC': ['google', 'bing', 'facebook']  # paid sources
+        }
+
+        medium_map = {
+            'SEO': ['organic'],
+            'PPC': ['cpc', 'ppc', 'paid', 'cpm']
+        }
+
+        lead_times = pd.to_datetime(self.leads_df['first_ticket_date'])
+        traffic_source = self.ga4_traffic_data['source'].str.lower()
+        traffic_medium = self.ga4_traffic_data['medium'].str.lower()
+
+        for current_source in source_map:
+            # Leads with a timestamp, matched against relevant traffic within 2 hours before / 1 hour after
+            leads_mask = (self.leads_df['attributed_source'] == current_source) & lead_times.notna()
+            if not leads_mask.any():
+                continue
+            relevant_traffic = self.ga4_traffic_data[
+                (traffic_source.isin(source_map[current_source])) &
+                (traffic_medium.isin(medium_map.get(current_source, [])))
+            ]
+            _, lo, hi, window_sessions = self._ga4_window_sessions(
+                relevant_traffic, lead_times[leads_mask], pd.Timedelta(hours=2), pd.Timedelta(hours=1)
+            )
+
+            leads = self.leads_df.loc[leads_mask]
+            details = leads['attribution_detail'] if 'attribution_detail' in leads.columns else pd.Series('', index=leads.index)
+            for idx, original_confidence, current_detail, has_traffic, sessions in zip(
+                    leads.index, leads['attribution_confidence'], details, hi > lo, window_sessions):
+                if not has_traffic:
                     continue
-                
-                # Look for traffic within 2 hours
-                time_window_start = lead_time - pd.Timedelta(hours=2)
-                time_window_end = lead_time + pd.Timedelta(hours=1)
-                
-                # Find matching traffic
-                matching_traffic = self.ga4_traffic_data[
-                    (self.ga4_traffic_data['datetime'] >= time_window_start) &
-                    (self.ga4_traffic_data['datetime'] <= time_window_end)
-                ]
-                
-                if not matching_traffic.empty:
-                    # Check source alignment
-                    source_map = {
-                        'SEO': ['google', 'bing', 'yahoo'],  # organic sources
-                        'PPC': ['google', 'bing', 'facebook']  # paid sources
-                    }
-
-                    medium_map = {
-                        'SEO': ['organic'],
-                        'PPC': ['cpc', 'ppc', 'paid', 'cpm']
-                    }
-                    
-                    current_source = lead['attributed_source']
-                    
-                    # Find relevant traffic
-                    if current_source in source_map:
-                        relevant_traffic = matching_traffic[
-                            (matching_traffic['source'].str.lower().isin(source_map[current_source])) &
-                            (matching_traffic['medium'].str.lower().isin(medium_map.get(current_source, [])))
-                        ]
-                        
-                        if not relevant_traffic.empty:
-                            # Boost confidence
-                            sessions = relevant_traffic['sessions'].sum()
-                            boost_factor = min(1.3, 1 + (sessions / 100))
-                            
-                            original_confidence = lead['attribution_confidence']
-                            new_confidence = min(100, original_confidence * boost_factor)
-                            
-                            self.leads_df.loc[idx, 'attribution_confidence'] = new_confidence
-                            self.leads_df.loc[idx, 'ga4_validated'] = True
-                            self.leads_df.loc[idx, 'ga4_sessions'] = sessions
-                            
-                            # Update attribution detail to include GA4 validation
-                            current_detail = lead.get('attribution_detail', '')
-                            ga4_detail = f" | GA4: {sessions} sessions validated"
-                            self.leads_df.loc[idx, 'attribution_detail'] = current_detail + ga4_detail
-                            
-                            validated_count += 1
-                            if new_confidence > original_confidence:
-                                boosted_count += 1
+
+                # Boost confidence
+                boost_factor = min(1.3, 1 + (sessions / 100))
+                new_confidence = min(100, original_confidence * boost_factor)
+
+                validated_idx.append(idx)
+                validated_conf.append(new_confidence)
+                validated_sessions.append(sessions)
+
+                # Update attribution detail to include GA4 validation
+                ga4_detail = f" | GA4: {sessions} sessions validated"
+                validated_detail.append(current_detail + ga4_detail)
+
+                validated_count += 1
+                if new_confidence > original_confidence:
+                    boosted_count += 1
+        
+        if validated_idx:
+            self.leads_df.loc[validated_idx, 'attribution_confidence'] = validated_conf
+            self.leads_df.loc[validated_idx, 'ga4_validated'] = True
+            self.leads_df.loc[validated_idx, 'ga4_sessions'] = validated_sessions
+            self.leads_df.loc[validated_idx, 'attribution_detail'] = validated_detail
         
         # Special handling for PPC detection using GA4
         print_colored("\nChecking for PPC attribution using GA4 data...", Colors.BLUE)
         ppc_attributed = 0
+        hit_idx, hit_conf, hit_detail = [], [], []
         
         # Look at all leads (not just Unknown) that might be PPC
-        for idx, lead in self.leads_df.iterrows():
-            if lead['attributed_source'] in ['Unknown', 'SEO']:  # Check Unknown and SEO (might be misattributed)
-                lead_time = pd.to_datetime(lead['first_ticket_date'])
-                if pd.isna(lead_time):
+        leads_mask = self.leads_df['attributed_source'].isin(['Unknown', 'SEO']) & lead_times.notna()  # SEO might be misattributed
+        if leads_mask.any():
+            # CPC/PPC traffic within 48 hours before lead (up to 30 minutes after)
+            ppc_traffic = self.ga4_traffic_data[self.ga4_traffic_data['medium'].isin(['cpc', 'ppc', 'paid'])]
+            rows, lo, hi, window_sessions = self._ga4_window_sessions(
+                ppc_traffic, lead_times[leads_mask], pd.Timedelta(hours=48), pd.Timedelta(minutes=30)
+            )
+            leads = self.leads_df.loc[leads_mask]
+
+            for idx, current_source, confidence, window_lo, window_hi, sessions in zip(
+                    leads.index, leads['attributed_source'], leads['attribution_confidence'], lo, hi, window_sessions):
+                if window_hi == window_lo or sessions <= 0:
                     continue
-                
-                # Look for PPC traffic within 48 hours before lead
-                time_window_start = lead_time - pd.Timedelta(hours=48)
-                time_window_end = lead_time + pd.Timedelta(minutes=30)
-                
-                # Find CPC/PPC traffic in GA4 data
-                ppc_traffic = self.ga4_traffic_data[
-                    (self.ga4_traffic_data['datetime'] >= time_window_start) &
-                    (self.ga4_traffic_data['datetime'] <= time_window_end) &
-                    (self.ga4_traffic_data['medium'].isin(['cpc', 'ppc', 'paid']))
-                ]
-                
-                if not ppc_traffic.empty:
-                    # Found PPC traffic near lead time
-                    sessions = ppc_traffic['sessions'].sum()
-                    sources = ppc_traffic['source'].value_counts().head(1)
-                    
-                    if sessions > 0:
-                        # Re-attribute to PPC
-                        if lead['attributed_source'] == 'Unknown':
-                            self.leads_df.loc[idx, 'attributed_source'] = 'PPC'
-                            self.leads_df.loc[idx, 'attribution_confidence'] = min(85, 60 + (sessions * 2))
-                            self.leads_df.loc[idx, 'attribution_detail'] = f"GA4 PPC detection: {sources.index[0]}/cpc ({sessions} sessions)"
-                            self.leads_df.loc[idx, 'data_source'] = 'ga4_ppc'
-                            ppc_attributed += 1
-                        elif lead['attributed_source'] == 'SEO' and sessions > 5:
-                            # Strong PPC signal - might override weak SEO attribution
-                            if lead['attribution_confidence'] < 80:
-                                self.leads_df.loc[idx, 'attributed_source'] = 'PPC'
-                                self.leads_df.loc[idx, 'attribution_confidence'] = min(90, 70 + (sessions * 2))
-                                self.leads_df.loc[idx, 'attribution_detail'] = f"GA4 PPC override: {sources.index[0]}/cpc ({sessions} sessions)"
-                                self.leads_df.loc[idx, 'data_source'] = 'ga4_ppc'
-                                ppc_attributed += 1
+                if current_source == 'SEO' and (sessions <= 5 or confidence >= 80):
+                    continue
+
+                # Found PPC traffic near lead time; most common source in original row order
+                sources = ppc_traffic['source'].iloc[np.sort(rows[window_lo:window_hi])].value_counts().head(1)
+
+                # Re-attribute to PPC
+                if current_source == 'Unknown':
+                    hit_idx.append(idx)
+                    hit_conf.append(min(85, 60 + (sessions * 2)))
+                    hit_detail.append(f"GA4 PPC detection: {sources.index[0]}/cpc ({sessions} sessions)")
+                    ppc_attributed += 1
+                else:
+                    # Strong PPC signal - might override weak SEO attribution
+                    hit_idx.append(idx)
+                    hit_conf.append(min(90, 70 + (sessions * 2)))
+                    hit_detail.append(f"GA4 PPC override: {sources.index[0]}/cpc ({sessions} sessions)")
+                    ppc_attributed += 1
+        
+        self._assign_attributions('PPC', hit_idx, hit_conf, hit_detail, data_source='ga4_ppc')
         
         print_colored(f"✓ GA4 validation complete: {validated_count} attributions validated", Colors.GREEN)
         print_colored(f"  - {boosted_count} confidence scores boosted", Colors.GREEN)
         if ppc_attributed > 0:
             print_colored(f"  - {ppc_attributed} leads attributed to PPC using GA4 data", Colors.GREEN)
 
+    def _get_report_stats(self) -> Dict:
+        """
+        Attribution, confidence, data source and timestamp stats shared by finalize_attribution and the reports.
+        
+        Computed once per attribution run: run_attribution and finalize_attribution clear
+        the cache, and it is rebuilt if leads_df is swapped for a frame with another index.
+        The column-derived entries (confidence, data source and timestamp stats) are only
+        present once their columns exist; the hours/days of week need a valid timestamp.
+        """
+        if self._stats_cache is None or self._stats_cache_index is not self.leads_df.index:
+            # Threshold counts as plain numpy reductions (NaN compares False, as in pandas)
+            confidence_scores = self.leads_df['attribution_confidence'].to_numpy(dtype=np.float64)
+            self._stats_cache = {
+                'attribution_counts': observed_value_counts(self.leads_df['attributed_source']),
+                'total_leads': len(self.leads_df),
+                'high_conf_count': np.count_nonzero(confidence_scores >= 80),
+                'medium_conf_count': np.count_nonzero(confidence_scores >= 50),
+            }
+            if 'confidence_level' in self.leads_df.columns:
+                self._stats_cache['confidence_counts'] = observed_value_counts(self.leads_df['confidence_level'])
+            if 'data_source' in self.leads_df.columns:
+                self._stats_cache['data_source_counts'] = observed_value_counts(self.leads_df['data_source'])
+            if 'first_inquiry_timestamp' in self.leads_df.columns:
+                valid_timestamps = self.leads_df['first_inquiry_timestamp'].dropna()
+                self._stats_cache['valid_timestamps'] = valid_timestamps
+                if len(valid_timestamps) > 0:
+                    hours, days_of_week = wall_clock_fields(valid_timestamps)
+                    self._stats_cache['timestamp_hours'] = hours
+                    self._stats_cache['timestamp_days_of_week'] = days_of_week
+            self._stats_cache_index = self.leads_df.index
+        return self._stats_cache
+
     def finalize_attribution(self):
         """Finalize attribution and set confidence levels with enhanced analysis"""
         # Categorize confidence levels
-        self.leads_df['confidence_level'] = self.leads_df['attribution_confidence'].apply(
-            lambda score: 'High' if score >= self.confidence_thresholds['high'] else 
-                         ('Medium' if score >= self.confidence_thresholds['medium'] else 
-                          ('Low' if score >= self.confidence_thresholds['low'] else 'Unknown'))
-        )
+        bins = [-np.inf, self.confidence_thresholds['low'], self.confidence_thresholds['medium'],
+                self.confidence_thresholds['high'], np.inf]
+        confidence_level = pd.cut(self.leads_df['attribution_confidence'], bins=bins,
+                                  labels=CONFIDENCE_LEVELS, right=False)
+        # Missing scores fall below every threshold
+        self.leads_df['confidence_level'] = confidence_level.fillna('Unknown')
+
+        # Scores are final from here on; float32 halves the column for the reductions that follow.
+        # Downcast only after bucketing so rounding can't push a score across a threshold
+        self.leads_df['attribution_confidence'] = self.leads_df['attribution_confidence'].astype(np.float32)
 
         # Add enhanced attribution analysis
         self.add_enhanced_analysis()
 
-        # Count final attribution by source
-        attribution_counts = self.leads_df['attributed_source'].value_counts()
+        # Count final attribution by source (kept for the reports that follow)
+        self._stats_cache = None
+        attribution_counts = self._get_report_stats()['attribution_counts']
 
         print_colored("\n=== Final Attribution Summary ===", Colors.BOLD + Colors.BLUE)
         
@@ -2468,7 +3245,7 @@ class LeadAttributionAnalyzer:
                 print_colored(f"  {source}: {count} leads ({count/len(self.leads_df)*100:.1f}%)", Colors.GREEN)
 
         # Count by confidence level
-        confidence_counts = self.leads_df['confidence_level'].value_counts()
+        confidence_counts = self._get_report_stats()['confidence_counts']
 
         print_colored("\nAttribution Confidence Summary:", Colors.BLUE)
         for level, count in confidence_counts.items():
@@ -2490,36 +3267,44 @@ class LeadAttributionAnalyzer:
         self.leads_df['believability_score'] = 0
         self.leads_df['analysis_notes'] = ''
 
-        # Process each lead
-        for idx, lead in self.leads_df.iterrows():
+        # Process each lead (as a plain dict - the helpers only look fields up by name),
+        # collecting each new column and writing it once after the loop
+        results = {column: [] for column in ('click_to_session_ratio', 'red_flags', 'attribution_reliability',
+                                             'likely_misattributed', 'suggested_real_source',
+                                             'believability_score', 'analysis_notes')}
+        for lead in self.leads_df.to_dict('records'):
             # Calculate click-to-session ratio
             ratio = self.calculate_click_to_session_ratio(lead)
-            self.leads_df.loc[idx, 'click_to_session_ratio'] = ratio
+            results['click_to_session_ratio'].append(ratio)
 
             # Detect red flags
             red_flags = self.detect_red_flags(lead, ratio)
-            self.leads_df.loc[idx, 'red_flags'] = ', '.join(red_flags)
+            results['red_flags'].append(', '.join(red_flags))
 
             # Calculate reliability
             reliability = self.calculate_attribution_reliability(ratio, red_flags)
-            self.leads_df.loc[idx, 'attribution_reliability'] = reliability
+            results['attribution_reliability'].append(reliability)
 
             # Check if likely misattributed
             is_misattributed = self.is_likely_misattributed(reliability, red_flags, ratio)
-            self.leads_df.loc[idx, 'likely_misattributed'] = is_misattributed
+            results['likely_misattributed'].append(is_misattributed)
 
             # Suggest real source if misattributed
+            suggested_source = ''
             if is_misattributed:
                 suggested_source = self.suggest_real_source(lead, red_flags, ratio)
-                self.leads_df.loc[idx, 'suggested_real_source'] = suggested_source
+            results['suggested_real_source'].append(suggested_source)
 
             # Calculate believability score
             believability = self.calculate_believability_score(lead, ratio, red_flags, reliability)
-            self.leads_df.loc[idx, 'believability_score'] = believability
+            results['believability_score'].append(believability)
 
             # Generate analysis notes
             notes = self.generate_analysis_notes(lead, ratio, red_flags, reliability, is_misattributed)
-            self.leads_df.loc[idx, 'analysis_notes'] = notes
+            results['analysis_notes'].append(notes)
+
+        for column, values in results.items():
+            self.leads_df[column] = pd.Series(values, index=self.leads_df.index, dtype=self.leads_df[column].dtype)
 
         print_colored("✓ Enhanced analysis completed", Colors.GREEN)
 
@@ -2787,7 +3572,7 @@ class LeadAttributionAnalyzer:
         """Save attribution results to CSV with enhanced analysis"""
         try:
             # Ensure output directory exists
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            ensure_output_dir(output_path)
             
             # Reorder columns to put new analysis columns at the end for better readability
             original_columns = [col for col in self.leads_df.columns if col not in [
@@ -2800,12 +3585,11 @@ class LeadAttributionAnalyzer:
                 'likely_misattributed', 'suggested_real_source', 'believability_score', 'analysis_notes'
             ]
             
-            # Reorder DataFrame columns
+            # Column order for the CSV (to_csv selects the columns itself, so the frame isn't copied)
             column_order = original_columns + [col for col in new_analysis_columns if col in self.leads_df.columns]
-            self.leads_df = self.leads_df[column_order]
             
             # Save to CSV
-            self.leads_df.to_csv(output_path, index=False)
+            self.leads_df.to_csv(output_path, index=False, columns=column_order)
             print_colored(f"✓ Enhanced attribution results saved to {output_path}", Colors.GREEN)
             print_colored(f"✓ Added {len(new_analysis_columns)} new analysis columns", Colors.GREEN)
             
@@ -2818,188 +3602,187 @@ class LeadAttributionAnalyzer:
         """Generate a comprehensive text report of attribution analysis"""
         try:
             # Ensure output directory exists
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            
-            with open(output_path, 'w') as f:
-                f.write("="*70 + "\n")
-                f.write("TRAFFIC ATTRIBUTION ANALYSIS REPORT\n")
-                f.write("="*70 + "\n")
-                f.write(f"Generated: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"Total Leads Analyzed: {len(self.leads_df)}\n\n")
-                
-                # Attribution breakdown by source
-                f.write("1. ATTRIBUTION BREAKDOWN BY SOURCE\n")
-                f.write("-" * 40 + "\n")
-                attribution_counts = self.leads_df['attributed_source'].value_counts()
-                total_leads = len(self.leads_df)
-                
-                for source, count in attribution_counts.items():
-                    percentage = (count / total_leads) * 100
-                    f.write(f"{source:15}: {count:4d} leads ({percentage:5.1f}%)\n")
-                
-                f.write(f"\nTotal Attributed: {attribution_counts.sum()} leads\n")
-                unknown_count = attribution_counts.get('Unknown', 0)
-                if unknown_count > 0:
-                    f.write(f"Attribution Rate: {((total_leads - unknown_count) / total_leads) * 100:.1f}%\n")
-                
-                # Confidence level distribution
-                f.write("\n2. CONFIDENCE LEVEL DISTRIBUTION\n")
-                f.write("-" * 40 + "\n")
-                confidence_counts = self.leads_df['confidence_level'].value_counts()
-                
-                for level, count in confidence_counts.items():
-                    percentage = (count / total_leads) * 100
-                    f.write(f"{level:10}: {count:4d} leads ({percentage:5.1f}%)\n")
-                
-                # Top products by source
-                f.write("\n3. TOP PRODUCTS BY SOURCE\n")
-                f.write("-" * 40 + "\n")
-                
-                for source in attribution_counts.index:
-                    if source == 'Unknown':
-                        continue
-                        
-                    source_leads = self.leads_df[self.leads_df['attributed_source'] == source]
-                    if len(source_leads) == 0:
-                        continue
-                        
-                    f.write(f"\n{source} Traffic ({len(source_leads)} leads):\n")
+            ensure_output_dir(output_path)
+            
+            # Build the report in memory and write it out in one call
+            parts = []
+            parts.append("="*70 + "\n")
+            parts.append("TRAFFIC ATTRIBUTION ANALYSIS REPORT\n")
+            parts.append("="*70 + "\n")
+            parts.append(f"Generated: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+            parts.append(f"Total Leads Analyzed: {len(self.leads_df)}\n\n")
+            
+            # Attribution breakdown by source
+            parts.append("1. ATTRIBUTION BREAKDOWN BY SOURCE\n")
+            parts.append("-" * 40 + "\n")
+            stats = self._get_report_stats()
+            attribution_counts = stats['attribution_counts']
+            total_leads = stats['total_leads']
+            
+            parts.extend(count_breakdown_lines(attribution_counts, total_leads, 15))
+            
+            parts.append(f"\nTotal Attributed: {attribution_counts.sum()} leads\n")
+            unknown_count = attribution_counts.get('Unknown', 0)
+            if unknown_count > 0:
+                parts.append(f"Attribution Rate: {((total_leads - unknown_count) / total_leads) * 100:.1f}%\n")
+            
+            # Confidence level distribution
+            parts.append("\n2. CONFIDENCE LEVEL DISTRIBUTION\n")
+            parts.append("-" * 40 + "\n")
+            confidence_counts = stats['confidence_counts']
+            
+            parts.extend(count_breakdown_lines(confidence_counts, total_leads, 10))
+            
+            # Top products by source
+            parts.append("\n3. TOP PRODUCTS BY SOURCE\n")
+            parts.append("-" * 40 + "\n")
+            
+            for source in attribution_counts.index:
+                if source == 'Unknown':
+                    continue
                     
-                    # Extract products from these leads
-                    all_products = []
-                    for _, lead in source_leads.iterrows():
-                        products = lead.get('product', '')
-                        if products:
-                            all_products.extend([p.strip() for p in str(products).split(';') if p.strip()])
+                source_leads = self.leads_df[self.leads_df['attributed_source'] == source]
+                if len(source_leads) == 0:
+                    continue
                     
-                    if all_products:
-                        product_counts = pd.Series(all_products).value_counts()
-                        for product, count in product_counts.head(5).items():
-                            f.write(f"  - {product}: {count} mentions\n")
-                    else:
-                        f.write("  - No specific products identified\n")
-                
-                # Time patterns analysis
-                f.write("\n4. TIME PATTERNS\n")
-                f.write("-" * 40 + "\n")
-                
-                # Day of week patterns
-                if 'day_of_week' in self.leads_df.columns:
-                    day_counts = self.leads_df['day_of_week'].value_counts()
-                    f.write("Day of Week Distribution:\n")
-                    day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-                    for day in day_order:
-                        if day in day_counts:
-                            count = day_counts[day]
-                            percentage = (count / total_leads) * 100
-                            f.write(f"  {day:10}: {count:3d} leads ({percentage:4.1f}%)\n")
-                
-                # Timestamp analysis
-                if 'first_inquiry_timestamp' in self.leads_df.columns:
-                    valid_timestamps = self.leads_df['first_inquiry_timestamp'].dropna()
-                    if len(valid_timestamps) > 0:
-                        f.write(f"\nTimestamp Analysis ({len(valid_timestamps)} leads with valid timestamps):\n")
-                        f.write(f"  Date Range: {valid_timestamps.min().strftime('%Y-%m-%d')} to {valid_timestamps.max().strftime('%Y-%m-%d')}\n")
-                        
-                        # Hour patterns
-                        hour_counts = valid_timestamps.dt.hour.value_counts().sort_index()
-                        peak_hour = hour_counts.idxmax()
-                        f.write(f"  Peak Hour: {peak_hour}:00 ({hour_counts[peak_hour]} leads)\n")
-                        
-                        # Business hours vs after hours
-                        business_hours = valid_timestamps.dt.hour.between(9, 17)
-                        business_count = business_hours.sum()
-                        after_hours_count = len(valid_timestamps) - business_count
-                        f.write(f"  Business Hours (9-17): {business_count} leads ({(business_count/len(valid_timestamps))*100:.1f}%)\n")
-                        f.write(f"  After Hours: {after_hours_count} leads ({(after_hours_count/len(valid_timestamps))*100:.1f}%)\n")
-                
-                # Data source breakdown
-                f.write("\n5. DATA SOURCE BREAKDOWN\n")
-                f.write("-" * 40 + "\n")
-                if 'data_source' in self.leads_df.columns:
-                    source_counts = self.leads_df['data_source'].value_counts()
-                    for data_source, count in source_counts.items():
-                        percentage = (count / total_leads) * 100
-                        f.write(f"{data_source:15}: {count:4d} leads ({percentage:5.1f}%)\n")
-                
-                # Key insights
-                f.write("\n6. KEY INSIGHTS\n")
-                f.write("-" * 40 + "\n")
-                
-                # Calculate insights
-                top_source = attribution_counts.index[0] if len(attribution_counts) > 0 else "Unknown"
-                top_source_count = attribution_counts.iloc[0] if len(attribution_counts) > 0 else 0
-                
-                high_confidence_count = confidence_counts.get('High', 0)
-                medium_confidence_count = confidence_counts.get('Medium', 0)
-                low_confidence_count = confidence_counts.get('Low', 0)
-                
-                f.write(f"• Primary traffic source: {top_source} ({top_source_count} leads)\n")
-                f.write(f"• High confidence attributions: {high_confidence_count} leads\n")
-                f.write(f"• Attribution quality: {((high_confidence_count + medium_confidence_count) / total_leads) * 100:.1f}% medium+ confidence\n")
-                
-                if 'first_inquiry_timestamp' in self.leads_df.columns and len(valid_timestamps) > 0:
-                    weekend_mask = valid_timestamps.dt.dayofweek.isin([5, 6])  # Saturday, Sunday
-                    weekend_count = weekend_mask.sum()
-                    weekday_count = len(valid_timestamps) - weekend_count
-                    f.write(f"• Weekend vs Weekday: {weekend_count} weekend, {weekday_count} weekday leads\n")
+                parts.append(f"\n{source} Traffic ({len(source_leads)} leads):\n")
                 
-                # Data limitations section
-                f.write("\n6. DATA LIMITATIONS\n")
-                f.write("-" * 40 + "\n")
-                
-                # Check for PPC attribution limitations
-                ppc_attributed_leads = self.leads_df[self.leads_df['attributed_source'] == 'PPC']
-                if len(ppc_attributed_leads) > 0:
-                    keyword_only_ppc = ppc_attributed_leads[
-                        ppc_attributed_leads['attribution_detail'].str.contains('keyword match only', na=False)
-                    ]
-                    if len(keyword_only_ppc) > 0:
-                        f.write(f"• PPC Attribution Limitation: {len(keyword_only_ppc)} PPC leads attributed using keyword matching only\n")
-                        f.write("  (No timestamp data available for time-based validation)\n")
-                        f.write(f"  Confidence capped at 60% for these attributions\n")
-                
-                # Check for missing timestamp data
-                missing_timestamps = self.leads_df['first_inquiry_timestamp'].isna().sum()
-                if missing_timestamps > 0:
-                    f.write(f"• Timestamp Data: {missing_timestamps} leads missing timestamp data\n")
-                    f.write("  This limits time-based attribution accuracy\n")
-                
-                # Check data source diversity
-                if 'data_source' in self.leads_df.columns:
-                    csv_only_sources = self.leads_df['data_source'].str.contains('csv', na=False).sum()
-                    if csv_only_sources > total_leads * 0.8:
-                        f.write("• Data Sources: Heavily reliant on CSV data sources\n")
-                        f.write("  Consider integrating live API data for real-time attribution\n")
-
-                # Recommendations
-                f.write("\n7. RECOMMENDATIONS\n")
-                f.write("-" * 40 + "\n")
-                
-                if top_source_count > total_leads * 0.4:
-                    f.write(f"• Consider diversifying traffic sources - {top_source} dominates ({(top_source_count/total_leads)*100:.1f}%)\n")
-                
-                if unknown_count > total_leads * 0.3:
-                    f.write(f"• Improve attribution tracking - {unknown_count} leads unattributed ({(unknown_count/total_leads)*100:.1f}%)\n")
-                
-                if low_confidence_count > high_confidence_count:
-                    f.write("• Enhance data quality - more low confidence than high confidence attributions\n")
-                
-                # PPC-specific recommendations
-                if len(ppc_attributed_leads) > 0:
-                    keyword_only_pct = (len(keyword_only_ppc) / len(ppc_attributed_leads)) * 100 if len(ppc_attributed_leads) > 0 else 0
-                    if keyword_only_pct > 50:
-                        f.write("• Include timestamp data in PPC reports for better attribution accuracy\n")
-                
-                if self.use_gsc:
-                    f.write("• GSC integration enabled - consider expanding API data sources\n")
+                # Extract products from these leads
+                if 'product' in source_leads.columns:
+                    product_counts = product_mention_counts(source_leads['product'])
                 else:
-                    f.write("• Consider enabling Google Search Console integration for better SEO attribution\n")
+                    product_counts = pd.Series(dtype=int)
                 
-                f.write("\n" + "="*70 + "\n")
-                f.write("End of Report\n")
-                f.write("="*70 + "\n")
+                if len(product_counts) > 0:
+                    for product, count in product_counts.head(5).items():
+                        parts.append(f"  - {product}: {count} mentions\n")
+                else:
+                    parts.append("  - No specific products identified\n")
+            
+            # Time patterns analysis
+            parts.append("\n4. TIME PATTERNS\n")
+            parts.append("-" * 40 + "\n")
+            
+            # Day of week patterns
+            if 'day_of_week' in self.leads_df.columns:
+                day_counts = self.leads_df['day_of_week'].value_counts()
+                parts.append("Day of Week Distribution:\n")
+                day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+                for day in day_order:
+                    if day in day_counts:
+                        count = day_counts[day]
+                        percentage = (count / total_leads) * 100
+                        parts.append(f"  {day:10}: {count:3d} leads ({percentage:4.1f}%)\n")
+            
+            # Timestamp analysis
+            if 'first_inquiry_timestamp' in self.leads_df.columns:
+                valid_timestamps = stats['valid_timestamps']
+                if len(valid_timestamps) > 0:
+                    parts.append(f"\nTimestamp Analysis ({len(valid_timestamps)} leads with valid timestamps):\n")
+                    parts.append(f"  Date Range: {valid_timestamps.min().strftime('%Y-%m-%d')} to {valid_timestamps.max().strftime('%Y-%m-%d')}\n")
+                    
+                    # Hour patterns
+                    hours, days_of_week = stats['timestamp_hours'], stats['timestamp_days_of_week']
+                    hour_counts = np.bincount(hours, minlength=24)
+                    peak_hour = int(hour_counts.argmax())
+                    parts.append(f"  Peak Hour: {peak_hour}:00 ({hour_counts[peak_hour]} leads)\n")
+                    
+                    # Business hours vs after hours
+                    business_count = np.count_nonzero((hours >= 9) & (hours <= 17))
+                    after_hours_count = len(valid_timestamps) - business_count
+                    parts.append(f"  Business Hours (9-17): {business_count} leads ({(business_count/len(valid_timestamps))*100:.1f}%)\n")
+                    parts.append(f"  After Hours: {after_hours_count} leads ({(after_hours_count/len(valid_timestamps))*100:.1f}%)\n")
+            
+            # Data source breakdown
+            parts.append("\n5. DATA SOURCE BREAKDOWN\n")
+            parts.append("-" * 40 + "\n")
+            if 'data_source' in self.leads_df.columns:
+                source_counts = stats['data_source_counts']
+                parts.extend(count_breakdown_lines(source_counts, total_leads, 15))
+            
+            # Key insights
+            parts.append("\n6. KEY INSIGHTS\n")
+            parts.append("-" * 40 + "\n")
+            
+            # Calculate insights
+            top_source = attribution_counts.index[0] if len(attribution_counts) > 0 else "Unknown"
+            top_source_count = attribution_counts.iloc[0] if len(attribution_counts) > 0 else 0
+            
+            # PPC attribution stats, shared by the limitations and recommendations sections
+            # (keyword-only PPC attributions are flagged by identify_ppc_traffic)
+            ppc_attributed_count = int(attribution_counts.get('PPC', 0))
+            keyword_only_ppc_count = 0
+            if ppc_attributed_count > 0 and 'ppc_keyword_only' in self.leads_df.columns:
+                is_ppc = self.leads_df['attributed_source'].eq('PPC').to_numpy()
+                keyword_only_ppc_count = np.count_nonzero(is_ppc & self.leads_df['ppc_keyword_only'].to_numpy(dtype=bool))
+            
+            high_confidence_count = confidence_counts.get('High', 0)
+            medium_confidence_count = confidence_counts.get('Medium', 0)
+            low_confidence_count = confidence_counts.get('Low', 0)
+            
+            parts.append(f"• Primary traffic source: {top_source} ({top_source_count} leads)\n")
+            parts.append(f"• High confidence attributions: {high_confidence_count} leads\n")
+            parts.append(f"• Attribution quality: {((high_confidence_count + medium_confidence_count) / total_leads) * 100:.1f}% medium+ confidence\n")
+            
+            if 'first_inquiry_timestamp' in self.leads_df.columns and len(valid_timestamps) > 0:
+                weekend_count = np.count_nonzero(days_of_week >= 5)  # Saturday, Sunday
+                weekday_count = len(valid_timestamps) - weekend_count
+                parts.append(f"• Weekend vs Weekday: {weekend_count} weekend, {weekday_count} weekday leads\n")
+            
+            # Data limitations section
+            parts.append("\n7. DATA LIMITATIONS\n")
+            parts.append("-" * 40 + "\n")
+            
+            # Check for PPC attribution limitations
+            if keyword_only_ppc_count > 0:
+                parts.append(f"• PPC Attribution Limitation: {keyword_only_ppc_count} PPC leads attributed using keyword matching only\n")
+                parts.append("  (No timestamp data available for time-based validation)\n")
+                parts.append(f"  Confidence capped at 60% for these attributions\n")
+            
+            # Check for missing timestamp data
+            missing_timestamps = self.leads_df['first_inquiry_timestamp'].isna().sum()
+            if missing_timestamps > 0:
+                parts.append(f"• Timestamp Data: {missing_timestamps} leads missing timestamp data\n")
+                parts.append("  This limits time-based attribution accuracy\n")
+            
+            # Check data source diversity
+            if 'data_source' in self.leads_df.columns:
+                csv_only_sources = contains_text(self.leads_df['data_source'], 'csv').sum()
+                if csv_only_sources > total_leads * 0.8:
+                    parts.append("• Data Sources: Heavily reliant on CSV data sources\n")
+                    parts.append("  Consider integrating live API data for real-time attribution\n")
+
+            # Recommendations
+            parts.append("\n8. RECOMMENDATIONS\n")
+            parts.append("-" * 40 + "\n")
+            
+            if top_source_count > total_leads * 0.4:
+                parts.append(f"• Consider diversifying traffic sources - {top_source} dominates ({(top_source_count/total_leads)*100:.1f}%)\n")
+            
+            if unknown_count > total_leads * 0.3:
+                parts.append(f"• Improve attribution tracking - {unknown_count} leads unattributed ({(unknown_count/total_leads)*100:.1f}%)\n")
+            
+            if low_confidence_count > high_confidence_count:
+                parts.append("• Enhance data quality - more low confidence than high confidence attributions\n")
+            
+            # PPC-specific recommendations
+            if ppc_attributed_count > 0:
+                keyword_only_pct = (keyword_only_ppc_count / ppc_attributed_count) * 100
+                if keyword_only_pct > 50:
+                    parts.append("• Include timestamp data in PPC reports for better attribution accuracy\n")
+            
+            if self.use_gsc:
+                parts.append("• GSC integration enabled - consider expanding API data sources\n")
+            else:
+                parts.append("• Consider enabling Google Search Console integration for better SEO attribution\n")
             
+            parts.append("\n" + "="*70 + "\n")
+            parts.append("End of Report\n")
+            parts.append("="*70 + "\n")
+
+            with open(output_path, 'w') as f:
+                f.write(''.join(parts))
+
             print_colored(f"✓ Text report saved to {output_path}", Colors.GREEN)
             return True
             
@@ -3011,40 +3794,42 @@ class LeadAttributionAnalyzer:
         """Export attribution summary statistics to CSV"""
         try:
             # Ensure output directory exists
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            ensure_output_dir(output_path)
             
             # Source counts and percentages
-            attribution_counts = self.leads_df['attributed_source'].value_counts()
-            total_leads = len(self.leads_df)
+            stats = self._get_report_stats()
+            attribution_counts = stats['attribution_counts']
+            total_leads = stats['total_leads']
+            
+            # Top product per source, from one split/explode over every lead's products
+            top_products = {}
+            if 'product' in self.leads_df.columns:
+                mentions = product_mentions(self.leads_df['product'].reset_index(drop=True))
+                mention_sources = self.leads_df['attributed_source'].to_numpy()[mentions.index]
+                for source, source_mentions in mentions.groupby(mention_sources, sort=False):
+                    # Only the single most mentioned product is needed; ties go to the first mentioned
+                    top_products[source] = Counter(source_mentions.tolist()).most_common(1)[0]
+            
+            # Confidence statistics for every source from one groupby, instead of a mask per source
+            confidence_scores = self.leads_df['attribution_confidence']
+            by_source = self.leads_df['attributed_source']
+            confidence_stats = confidence_scores.groupby(by_source, sort=False, observed=True).agg(['mean', 'min', 'max'])
+            high_conf_counts = confidence_scores.ge(80).groupby(by_source, sort=False, observed=True).sum()
             
             summary_data = []
             
             for source, count in attribution_counts.items():
-                source_leads = self.leads_df[self.leads_df['attributed_source'] == source]
-                
                 # Calculate confidence statistics
-                confidence_scores = source_leads['attribution_confidence']
-                avg_confidence = confidence_scores.mean() if len(confidence_scores) > 0 else 0
-                min_confidence = confidence_scores.min() if len(confidence_scores) > 0 else 0
-                max_confidence = confidence_scores.max() if len(confidence_scores) > 0 else 0
+                avg_confidence = confidence_stats.at[source, 'mean']
+                min_confidence = confidence_stats.at[source, 'min']
+                max_confidence = confidence_stats.at[source, 'max']
                 
                 # High confidence percentage for this source
-                high_conf_count = len(source_leads[source_leads['attribution_confidence'] >= 80])
+                high_conf_count = high_conf_counts[source]
                 high_conf_pct = (high_conf_count / count * 100) if count > 0 else 0
                 
                 # Top products for this source
-                all_products = []
-                for _, lead in source_leads.iterrows():
-                    products = lead.get('product', '')
-                    if products:
-                        all_products.extend([p.strip() for p in str(products).split(';') if p.strip()])
-                
-                top_product = ""
-                top_product_count = 0
-                if all_products:
-                    product_counts = pd.Series(all_products).value_counts()
-                    top_product = product_counts.index[0] if len(product_counts) > 0 else ""
-                    top_product_count = product_counts.iloc[0] if len(product_counts) > 0 else 0
+                top_product, top_product_count = top_products.get(source, ("", 0))
                 
                 summary_data.append({
                     'source': source,
@@ -3077,10 +3862,20 @@ class LeadAttributionAnalyzer:
             return
             
         percentage = (current / total) * 100
-        bar_length = 40
+        bar_length = PROGRESS_BAR_LENGTH
         filled_length = int(bar_length * current // total)
-        
-        bar = '█' * filled_length + '-' * (bar_length - filled_length)
+
+        # Throttle tight loops: skip the write + flush when the bar hasn't moved and the
+        # last draw was very recent (the final update is always drawn)
+        now = time.monotonic()
+        if current != total and self._progress_bar_state is not None:
+            last_description, last_filled, last_time = self._progress_bar_state
+            if (last_description == description and last_filled == filled_length
+                    and now - last_time < PROGRESS_BAR_MIN_INTERVAL):
+                return
+        self._progress_bar_state = (description, filled_length, now)
+
+        bar = PROGRESS_BAR_FILLED[:filled_length] + PROGRESS_BAR_EMPTY[:bar_length - filled_length]
         print(f"\r{description}: |{bar}| {current}/{total} ({percentage:.1f}%)", end='', flush=True)
         
         if current == total:
@@ -3339,7 +4134,7 @@ class LeadAttributionAnalyzer:
         overrides_count = 0
         api_fetch_count = 0
         
-        for idx, row in self.leads_df.iterrows():
+        for idx, row in zip(self.leads_df.index, self.leads_df.to_dict('records')):
             email = row.get('email', '')
             progress = f"[{idx + 1}/{total_leads}]"
             
@@ -3463,7 +4258,7 @@ class LeadAttributionAnalyzer:
         if overrides_count > 0:
             overrides = self.leads_df[self.leads_df['email_content_override'] == True]
             print_colored('Attribution changes:', Colors.BLUE)
-            for source in overrides['attributed_source'].value_counts().index:
+            for source in observed_value_counts(overrides['attributed_source']).index:
                 count = len(overrides[overrides['attributed_source'] == source])
                 print_colored(f'  → {source}: {count} leads', Colors.GREEN)
 
@@ -3471,9 +4266,14 @@ class LeadAttributionAnalyzer:
         """Display key insights to console with colored formatting"""
         print_colored("\n=== KEY INSIGHTS ===", Colors.BOLD + Colors.BLUE)
         
+        if len(self.leads_df) == 0:
+            print_colored("No leads to summarize", Colors.YELLOW)
+            return
+        
         # Attribution breakdown
-        attribution_counts = self.leads_df['attributed_source'].value_counts()
-        total_leads = len(self.leads_df)
+        stats = self._get_report_stats()
+        attribution_counts = stats['attribution_counts']
+        total_leads = stats['total_leads']
         
         if len(attribution_counts) > 0:
             top_source = attribution_counts.index[0]
@@ -3481,8 +4281,8 @@ class LeadAttributionAnalyzer:
             print_colored(f"🎯 Primary Traffic Source: {top_source} ({top_count} leads, {(top_count/total_leads)*100:.1f}%)", Colors.GREEN)
         
         # Attribution quality
-        high_conf_count = len(self.leads_df[self.leads_df['attribution_confidence'] >= 80])
-        medium_conf_count = len(self.leads_df[self.leads_df['attribution_confidence'] >= 50])
+        high_conf_count = stats['high_conf_count']
+        medium_conf_count = stats['medium_conf_count']
         quality_score = ((high_conf_count + medium_conf_count) / total_leads) * 100
         
         quality_color = Colors.GREEN if quality_score >= 70 else Colors.YELLOW if quality_score >= 50 else Colors.RED
@@ -3497,15 +4297,15 @@ class LeadAttributionAnalyzer:
         
         # Time patterns
         if 'first_inquiry_timestamp' in self.leads_df.columns:
-            valid_timestamps = self.leads_df['first_inquiry_timestamp'].dropna()
+            valid_timestamps = stats['valid_timestamps']
             if len(valid_timestamps) > 0:
-                business_hours = valid_timestamps.dt.hour.between(9, 17)
-                business_pct = (business_hours.sum() / len(valid_timestamps)) * 100
+                hours = stats['timestamp_hours']
+                business_pct = (np.count_nonzero((hours >= 9) & (hours <= 17)) / len(valid_timestamps)) * 100
                 print_colored(f"🕒 Business Hours Activity: {business_pct:.1f}% of leads during 9-17h", Colors.BLUE)
         
         # Data source diversity
         if 'data_source' in self.leads_df.columns:
-            data_sources = self.leads_df['data_source'].nunique()
+            data_sources = len(stats['data_source_counts'])
             print_colored(f"📈 Data Source Diversity: {data_sources} different attribution methods used", Colors.BLUE)
         
         print_colored("=" * 50, Colors.BLUE)
@@ -3522,7 +4322,8 @@ def analyze_traffic_attribution(leads_path="./output/leads_with_products.csv",
                               use_ga4=False,
                               ga4_property_id=None,
                               compare_methods=False,
-                              generate_reports=True):
+                              generate_reports=True,
+                              emit_insights=True):
     """Main function to run traffic attribution analysis"""
     try:
         print_colored("=== Traffic Attribution Analysis ===", Colors.BOLD + Colors.BLUE)
@@ -3583,7 +4384,8 @@ def analyze_traffic_attribution(leads_path="./output/leads_with_products.csv",
                 print_colored("  - Summary CSV: ./output/attribution_summary.csv", Colors.BLUE)
             
             # Display key insights
-            analyzer.display_key_insights()
+            if emit_insights:
+                analyzer.display_key_insights()
             
             return len(attributed_leads)
         else:
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test script for the batched keyword matching helpers
+Checks the array code against the per-pair loops it replaced
+"""
+
+from modules.traffic_attribution import LeadAttributionAnalyzer, aggregate_keyword_matches, window_keyword_hits
+import numpy as np
+import pandas as pd
+
+def reference_keyword_matches(lead_keyword_rows, similarity_matrix, similarity_weights, query_terms,
+                              totals, lowest, threshold=60):
+    """Per-lead aggregates computed one (lead keyword, query) pair at a time"""
+    n_queries = similarity_matrix.shape[1]
+    weights = np.broadcast_to(similarity_weights, (n_queries,))
+    matched, match_scores, lead_totals, lead_lowest = [], [], [], []
+    for rows in lead_keyword_rows:
+        any_match, best_score, lowest_value = False, -np.inf, np.inf
+        sums = [0] * len(totals)
+        for row in rows:
+            for q in range(n_queries):
+                similarity = similarity_matrix[row, q]
+                if similarity <= threshold:
+                    continue
+                any_match = True
+                score = similarity * weights[q]
+                for terms in query_terms:
+                    score = score + terms[q]
+                best_score = max(best_score, score)
+                for i, values in enumerate(totals):
+                    sums[i] += values[q]
+                if not np.isnan(lowest[q]):
+                    lowest_value = min(lowest_value, lowest[q])
+        matched.append(any_match)
+        match_scores.append(best_score)
+        lead_totals.append(sums)
+        lead_lowest.append(lowest_value)
+    return np.array(matched), np.array(match_scores), np.array(lead_totals).reshape(-1, len(totals)), np.array(lead_lowest)
+
+def test_aggregate_keyword_matches():
+    """Batched per-lead aggregates match the per-pair loop, across several thread-pool chunks"""
+    rng = np.random.default_rng(7)
+    n_keywords, n_queries, n_leads = 120, 40, 700
+    similarity_matrix = rng.integers(0, 101, size=(n_keywords, n_queries)).astype(np.int16)
+    # Every fifth lead has no keywords
+    lead_keyword_rows = [np.array([], dtype=np.int64) if i % 5 == 0 else rng.choice(n_keywords, size=rng.integers(1, 6))
+                         for i in range(n_leads)]
+    clicks = rng.integers(0, 50, size=n_queries).astype(np.int32)
+    impressions = rng.integers(0, 5000, size=n_queries)
+    positions = rng.uniform(1, 30, size=n_queries)
+    positions[::7] = np.nan
+    query_terms = [rng.uniform(0, 60, size=n_queries), rng.uniform(0, 20, size=n_queries)]
+
+    for similarity_weights in (0.4, np.where(clicks > 0, 0.2, 0.4)):
+        matched, match_scores, lead_totals, best_positions, _ = aggregate_keyword_matches(
+            lead_keyword_rows, similarity_matrix, similarity_weights, query_terms,
+            totals=(clicks, impressions), lowest=positions
+        )
+        expected = reference_keyword_matches(lead_keyword_rows, similarity_matrix, similarity_weights, query_terms,
+                                             (clicks, impressions), positions)
+
+        assert np.array_equal(matched, expected[0])
+        assert not matched[::5].any()
+        assert np.allclose(match_scores, expected[1])
+        for i, lead_total in enumerate(lead_totals):
+            assert np.array_equal(lead_total, expected[2][:, i])
+        assert np.array_equal(best_positions, expected[3])
+    print("✓ aggregate_keyword_matches matches the per-pair loop")
+
+def test_window_keyword_hits():
+    """Hits come back in the old (row, lead keyword, term) loop order with the same scores"""
+    rng = np.random.default_rng(11)
+    n_lead_keywords, n_terms = 4, 12
+    lead_scores = rng.integers(40, 101, size=(n_lead_keywords, n_terms)).astype(np.int16)
+    # Several terms per PPC row, some shared between rows
+    row_terms = [[3, 0, 7], [5], [1, 2, 3, 4], [], [11, 0, 6, 9], [8, 10]]
+    term_offsets = np.concatenate(([0], np.cumsum([len(terms) for terms in row_terms]))).astype(np.int64)
+    flat_term_ids = np.array([term for terms in row_terms for term in terms], dtype=np.int64)
+    window_rows = np.array([0, 2, 3, 4, 5], dtype=np.int64)
+
+    kw_positions, term_ids, similarities, hit_rows = window_keyword_hits(
+        lead_scores, window_rows, term_offsets, flat_term_ids
+    )
+
+    expected = []
+    for position, row in enumerate(window_rows.tolist()):
+        for k in range(n_lead_keywords):
+            for term in row_terms[row]:
+                if lead_scores[k, term] > 60:
+                    expected.append((k, term, int(lead_scores[k, term]), position))
+    actual = list(zip(kw_positions.tolist(), term_ids.tolist(), similarities.tolist(), hit_rows.tolist()))
+    assert len(expected) > 0
+    assert actual == expected
+    print("✓ window_keyword_hits matches the nested loop order")
+
+def reference_time_proximity(lead_time, ppc_dates, window_hours):
+    """Nearest PPC activity gap and proximity score for one lead, filtering the PPC dates per lead"""
+    if pd.isna(lead_time):
+        return np.nan, None
+    if lead_time.tz is None:
+        lead_time = lead_time.tz_localize('UTC')
+    window_start = (lead_time - pd.Timedelta(hours=window_hours)).normalize()
+    window_end = (lead_time + pd.Timedelta(hours=2)).normalize()
+    time_diffs = [abs((lead_time - ppc_date).total_seconds() / 3600)
+                  for ppc_date in ppc_dates.dropna() if window_start <= ppc_date <= window_end]
+    if not time_diffs:
+        return np.nan, None
+
+    min_hours_diff = min(time_diffs)
+    if min_hours_diff <= 1:
+        return min_hours_diff, 100
+    elif min_hours_diff <= 6:
+        return min_hours_diff, 95
+    elif min_hours_diff <= 12:
+        return min_hours_diff, 85
+    elif min_hours_diff <= 24:
+        return min_hours_diff, 75
+    elif min_hours_diff <= 48:
+        return min_hours_diff, 60
+    return min_hours_diff, max(0, 50 - (min_hours_diff - 48) / 24 * 10)
+
+def test_ppc_time_proximity():
+    """Nearest-activity gaps and proximity scores match the per-lead window filter"""
+    analyzer = LeadAttributionAnalyzer()
+    ppc_dates = pd.Series(pd.to_datetime(['2024-03-03', '2024-03-01', None, '2024-03-10', '2024-03-03'], utc=True))
+    lead_times = pd.Series(pd.to_datetime([
+        '2024-02-20 10:00',  # before the first PPC date
+        '2024-03-01 00:30',
+        '2024-03-01 01:00',  # exactly 1h
+        '2024-03-01 06:00',  # exactly 6h
+        '2024-03-02 12:00',
+        '2024-03-03 23:00',
+        '2024-03-09 23:00',  # nearest activity is after the lead
+        '2024-03-11 12:00',
+        '2024-03-12 06:00',  # beyond 48h: linear decay
+        None,
+        '2024-03-20 08:00',  # after the last PPC date
+    ], utc=True), index=range(100, 111))
+
+    for leads in (lead_times, lead_times.dt.tz_localize(None)):
+        start_ns, end_ns, gap_hours, proximity_scores = analyzer._ppc_time_proximity(leads, ppc_dates)
+        assert len(gap_hours) == len(leads)
+        for lead_time, gap, score in zip(leads, gap_hours.tolist(), proximity_scores.tolist()):
+            expected_gap, expected_score = reference_time_proximity(lead_time, ppc_dates, analyzer.attribution_window_hours)
+            if np.isnan(expected_gap):
+                assert np.isnan(gap), (lead_time, gap)
+            else:
+                assert np.isclose(gap, expected_gap), (lead_time, gap, expected_gap)
+                assert np.isclose(score, expected_score), (lead_time, score, expected_score)
+
+        # Window bounds for dated leads, as UTC nanoseconds
+        dated = leads.notna().to_numpy()
+        utc_leads = leads.dt.tz_localize('UTC') if leads.dt.tz is None else leads
+        expected_start = (utc_leads - pd.Timedelta(hours=analyzer.attribution_window_hours)).dt.normalize()
+        expected_end = (utc_leads + pd.Timedelta(hours=2)).dt.normalize()
+        assert np.array_equal(start_ns[dated], expected_start[dated].to_numpy(dtype='datetime64[ns]').astype('int64'))
+        assert np.array_equal(end_ns[dated], expected_end[dated].to_numpy(dtype='datetime64[ns]').astype('int64'))
+    print("✓ _ppc_time_proximity matches the per-lead window filter")
+
+def main():
+    """Run all keyword matching tests"""
+    test_aggregate_keyword_matches()
+    test_window_keyword_hits()
+    test_ppc_time_proximity()
+
+if __name__ == "__main__":
+    main()